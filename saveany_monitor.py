@@ -16,16 +16,39 @@ import os
 import subprocess
 import sys
 import json
+import gzip
 import socket
 import webbrowser
-import queue
+import re
+import selectors
+import shutil
+import tomllib
+from itertools import islice
+from operator import attrgetter
+from dataclasses import dataclass, fields, replace
 from datetime import datetime, timedelta
 from collections import deque
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import parse_qs, urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
-# 全局变量用于 Web 服务
-monitor_data = {
+import win_counters
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 解析 POST 请求体，两者都直接接受 UTF-8 字节，无需先 decode
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def json_dumps(obj):
+    """序列化为 UTF-8 编码的 JSON 字节，可用时使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+# 进程未运行时的进程相关字段，采样时整体覆盖
+_OFFLINE_MONITOR_DATA = {
     "status": "未运行",
     "pid": "-",
     "uptime": "-",
@@ -38,105 +61,346 @@ monitor_data = {
     "upload_speed": "0 KB/s",
     "total_download": "0 MB",
     "total_upload": "0 MB",
-    "sys_download": "0 KB/s",
-    "sys_upload": "0 KB/s",
-    "last_update": ""
 }
 
+
+@dataclass(slots=True, frozen=True)
+class StatusSnapshot:
+    """一次采样的状态快照；不可修改，采样线程每次生成新对象整体替换 monitor_data"""
+    status: str
+    pid: str
+    uptime: str
+    cpu: float
+    memory: str
+    memory_percent: float
+    threads: str
+    handles: str
+    download_speed: str
+    upload_speed: str
+    total_download: str
+    total_upload: str
+    sys_download: str
+    sys_upload: str
+    last_update: str
+
+
+# 全局变量用于 Web 服务
+monitor_data = StatusSnapshot(
+    **_OFFLINE_MONITOR_DATA,
+    sys_download="0 KB/s",
+    sys_upload="0 KB/s",
+    last_update=""
+)
+
+# 状态 JSON 的字段固定，按字段顺序预先生成格式串，序列化时只需转义字符串值
+_STATUS_KEYS = tuple(field.name for field in fields(StatusSnapshot))
+_STATUS_FORMAT = '{' + ','.join('"%s":%%s' % key for key in _STATUS_KEYS) + '}'
+_status_values = attrgetter(*_STATUS_KEYS)
+_encode_json_string = json.encoder.encode_basestring
+
+
+def encode_status(snapshot):
+    """序列化状态快照；orjson 可直接序列化 dataclass，否则用固定字段的格式串"""
+    if orjson is not None:
+        return orjson.dumps(snapshot)
+    values = []
+    for value in _status_values(snapshot):
+        if type(value) is str:
+            values.append(_encode_json_string(value))
+        else:
+            values.append(value)
+    return (_STATUS_FORMAT % tuple(values)).encode('utf-8')
+
+
+# /api/status 响应内容，每次采样后由 publish_status() 重新生成
+_status_bytes = encode_status(monitor_data)
+# ETag 带上每次启动随机生成的前缀，监控程序重启后版本号从头计数也不会与浏览器缓存的旧 ETag 相同
+_ETAG_EPOCH = os.urandom(4).hex().encode('ascii')
+_status_etag = b'"%s-0"' % _ETAG_EPOCH
+
 # 全局变量
 config_path = None
 control_callback = None
+# Web 请求处理出错时的记录回调，由主程序设置为写入程序日志
+web_error_callback = None
 recent_logs = deque(maxlen=500)  # 保存最近500行日志用于Web显示
 download_tasks = {}  # 当前下载任务列表 {task_id: {filename, downloaded, total, progress, status, start_time}}
 
+# /api/logs 响应缓冲，与 recent_logs 同步维护，请求时无需重新拼接和编码
+_log_bytes = bytearray()
+_log_sizes = deque()
+_log_lock = threading.Lock()
+# 自上次清空以来追加的总行数和清空次数，/api/events 据此只推送客户端尚未收到的新行
+_log_count = 0
+_log_epoch = 0
+_EMPTY_LOGS_BYTES = json_dumps({"logs": '暂无日志，请通过监控程序启动 SaveAny-Bot 以捕获日志'})
 
-class StoppableHTTPServer(HTTPServer):
-    """可停止的 HTTP 服务器，针对 Windows Server 优化"""
-    
-    allow_reuse_address = True
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._stop_event = threading.Event()
-        self.socket.settimeout(1.0)
-    
-    def serve_forever_stoppable(self):
-        """可停止的服务循环"""
-        while not self._stop_event.is_set():
-            try:
-                self.handle_request()
-            except socket.timeout:
-                continue
-            except OSError:
-                break
-            except Exception:
-                continue
-    
-    def stop(self):
-        """停止服务器"""
-        self._stop_event.set()
-        try:
-            self.socket.close()
-        except Exception:
-            pass
+# /api/events 推送通知：状态或日志更新时递增版本号并唤醒等待中的连接
+_events_cond = threading.Condition()
+_status_version = 0
+_log_version = 0
 
+# 配置文件缓存，键为 (路径, mtime, 大小)，界面和 Web 服务共用
+# 每个缓存都是 (键, 值) 元组，整体替换以保证线程安全
+_config_text_cache = (None, '')
+_config_parsed_cache = (None, None)
+# /api/config 响应缓存
+_config_response = (None, b'')
 
-class MonitorHTTPHandler(BaseHTTPRequestHandler):
-    """HTTP 请求处理器"""
-    
-    protocol_version = 'HTTP/1.0'
-    timeout = 10
-    
-    def log_message(self, format, *args):
-        pass
-    
-    def handle_one_request(self):
+# 配置文件读写缓冲区大小，常见配置文件一次 read()/write() 即可完成
+CONFIG_IO_BUFSIZE = 1 << 20
+
+# 每次采样通过 Process.as_dict 一次取齐的字段；num_handles/io_counters 并非所有平台都有
+# memory_percent 每次都会查询一次物理内存总量，改为用缓存的总量自行计算
+PROCESS_SAMPLE_ATTRS = ['cpu_percent', 'memory_info', 'num_threads']
+PROCESS_SAMPLE_ATTRS += [name for name in ('num_handles', 'io_counters') if hasattr(psutil.Process, name)]
+# Windows 上进程 IO 计数由 win_counters 直接读取，不经过 psutil
+if win_counters.AVAILABLE and 'io_counters' in PROCESS_SAMPLE_ATTRS:
+    PROCESS_SAMPLE_ATTRS.remove('io_counters')
+# num_handles 只有 Windows 上有，且开销较大；监控页和 Web 页面都看不到时跳过
+HAS_NUM_HANDLES = 'num_handles' in PROCESS_SAMPLE_ATTRS
+PROCESS_SAMPLE_ATTRS_NO_HANDLES = [name for name in PROCESS_SAMPLE_ATTRS if name != 'num_handles']
+
+# 监控页程序日志框最多保留的行数，以及合并插入的延迟（毫秒）
+LOG_TEXT_MAX_LINES = 100
+LOG_TEXT_FLUSH_DELAY = 200
+
+# 日志文件两次 flush 之间的最短间隔（秒）；期间写入的日志留在文件缓冲区，由界面线程定时补刷
+LOG_FLUSH_INTERVAL = 0.5
+
+# 读取 SaveAny-Bot 输出时每次读取的最大字节数，读取缓冲区只分配一次
+OUTPUT_READ_SIZE = 64 * 1024
+
+# 控制台日志框最多显示的行数，超出后裁剪到 CONSOLE_KEEP_LINES 行；待显示队列同样以此为上限
+CONSOLE_MAX_LINES = 2000
+CONSOLE_KEEP_LINES = 1500
+
+# 配置编辑器的撤销步数上限；只追加的日志框不开启撤销
+CONFIG_EDITOR_MAX_UNDO = 100
+
+# 字节数和速率的显示格式，按 1024 的幂次查表：下标 = (bit_length - 1) // 10，超出表长取最后一项
+_BYTES_FORMATS = ('%d B', '%.1f KB', '%.1f MB', '%.2f GB')
+_SPEED_FORMATS = ('%d B/s', '%.1f KB/s', '%.2f MB/s')
+_UNIT_SCALES = (1, 1 << 10, 1 << 20, 1 << 30)
+
+# 变化缓慢的字段（句柄数、累计流量）每隔多少次采样更新一次
+SLOW_SAMPLE_EVERY = 5
+
+# 两次采样之间的最小间隔（秒），采样耗时过长时也不会连续采样；cpu_percent 需要足够的时间窗口
+MIN_SAMPLE_INTERVAL = 0.5
+
+# 界面刷新间隔（毫秒）；只读取采样线程的最新快照，快照未变化时不产生 Tcl 调用
+UI_REFRESH_INTERVAL = 250
+
+# 启动 SaveAny-Bot 时隐藏控制台窗口的 STARTUPINFO，只在导入时构建一次；非 Windows 平台为 None
+if sys.platform == 'win32':
+    BOT_STARTUPINFO = subprocess.STARTUPINFO()
+    BOT_STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    BOT_STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+else:
+    BOT_STARTUPINFO = None
+
+# 配置文件解析用的预编译正则
+# section 匹配到下一个以 [ 开头的行为止，逐行线性扫描，不会跨越其他 section 回溯
+_RE_TELEGRAM_BLOCK = re.compile(r'^\[telegram\][^\n]*(?:\n(?![ \t]*\[)[^\n]*)*', re.MULTILINE)
+_RE_PROXY_BLOCK = re.compile(r'^\[telegram\.proxy\][^\n]*(?:\n(?![ \t]*\[)[^\n]*)*', re.MULTILINE)
+_RE_STORAGE_BLOCK = re.compile(r'^\[\[storages\]\][^\n]*(?:\n(?![ \t]*\[)[^\n]*)*', re.MULTILINE)
+# 块内的 键 = 值 赋值行，值为基本字符串、字面量字符串或布尔值
+_RE_KEY_VALUE = re.compile(
+    r'^([ \t]*([A-Za-z0-9_-]+)[ \t]*=[ \t]*)("(?:[^"\\\n]|\\.)*"|\'[^\'\n]*\'|true\b|false\b)',
+    re.MULTILINE | re.IGNORECASE)
+
+# 下载任务日志解析用的预编译正则
+# 任务开始、文件开始下载、进度更新三种事件合并为一个正则，每行日志只扫描一次
+_RE_TASK_EVENT = re.compile(
+    r'Processing task: (?P<task_id>\w+)'
+    r'|file\[(?P<start_file>.+?)\]: Starting file download'
+    r'|Progress update: (?P<progress_file>.+?), (?P<downloaded>\d+)/(?P<total>\d+)')
+_RE_TASK_COMPLETE = re.compile(r'file\[(.+?)\].*(?:downloaded successfully|completed)')
+_RE_TASK_FILE = re.compile(r'file\s*\[(.+?)\]')
+
+
+def read_config_text(path):
+    """读取配置文件内容，返回 (缓存键, 内容)，文件未变化时直接复用缓存"""
+    global _config_text_cache
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    cached_key, content = _config_text_cache
+    if cached_key != key:
+        with open(path, 'r', encoding='utf-8', buffering=CONFIG_IO_BUFSIZE) as f:
+            content = f.read()
+        _config_text_cache = (key, content)
+    return key, content
+
+
+def read_config_parsed(path):
+    """读取并解析配置文件，返回 (内容, 解析结果)，文件未变化时直接复用缓存"""
+    global _config_parsed_cache
+    key, content = read_config_text(path)
+    cached_key, parsed = _config_parsed_cache
+    if cached_key != key:
+        parsed = parse_config_settings(content)
+        _config_parsed_cache = (key, parsed)
+    return content, parsed
+
+
+def invalidate_config_cache():
+    """配置文件被改写后清空缓存"""
+    global _config_text_cache, _config_parsed_cache, _config_response
+    _config_text_cache = (None, '')
+    _config_parsed_cache = (None, None)
+    _config_response = (None, b'')
+
+
+def write_config_with_backup(path, content):
+    """备份并写入配置文件
+
+    .bak 优先用硬链接指向旧文件（不复制数据），跨文件系统时回退为复制；
+    新内容先写入临时文件再原子替换，.bak 仍指向原来的文件内容。
+    """
+    if os.path.exists(path):
+        backup_path = path + ".bak"
         try:
-            super().handle_one_request()
-        except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
+            os.remove(backup_path)
+        except FileNotFoundError:
             pass
-        except socket.timeout:
-            pass
-        except Exception:
-            pass
-    
-    def do_GET(self):
         try:
-            parsed_path = urlparse(self.path)
-            
-            if parsed_path.path == '/' or parsed_path.path == '/index.html':
-                self.send_html_page()
-            elif parsed_path.path == '/api/status':
-                self.send_json_status()
-            elif parsed_path.path == '/api/config':
-                self.send_config()
-            elif parsed_path.path == '/api/logs':
-                self.send_logs()
-            elif parsed_path.path == '/api/tasks':
-                self.send_tasks()
-            else:
-                self.send_error(404, "Not Found")
-        except Exception:
-            pass
+            os.link(path, backup_path)
+        except OSError:
+            shutil.copy2(path, backup_path)
     
-    def do_POST(self):
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', buffering=CONFIG_IO_BUFSIZE) as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # 写入或替换失败时删除临时文件，不在配置目录留下残留
         try:
-            parsed_path = urlparse(self.path)
-            
-            if parsed_path.path == '/api/config':
-                self.save_config()
-            elif parsed_path.path == '/api/control':
-                self.handle_control()
-            elif parsed_path.path == '/api/tasks/clear':
-                self.clear_tasks()
-            else:
-                self.send_error(404, "Not Found")
-        except Exception:
+            os.remove(tmp_path)
+        except OSError:
             pass
-    
-    def send_html_page(self):
-        """发送 HTML 页面"""
-        html = '''<!DOCTYPE html>
+        raise
+    invalidate_config_cache()
+
+
+def publish_status():
+    """序列化 monitor_data 并缓存，/api/status 直接返回缓存的字节"""
+    global _status_bytes, _status_etag, _status_version
+    content = encode_status(monitor_data)
+    with _events_cond:
+        _status_version += 1
+        _status_bytes = content
+        _status_etag = b'"%s-%d"' % (_ETAG_EPOCH, _status_version)
+        _events_cond.notify_all()
+
+
+def notify_log_changed():
+    """通知 /api/events 连接日志已更新"""
+    global _log_version
+    with _events_cond:
+        _log_version += 1
+        _events_cond.notify_all()
+
+
+def build_logs_json():
+    """生成 {"logs": ...} 响应内容"""
+    with _log_lock:
+        logs = _log_bytes[:-2]
+    return b''.join((b'{"logs": "', logs, b'"}')) if logs else _EMPTY_LOGS_BYTES
+
+
+def build_log_event(since):
+    """生成 /api/events 的日志事件，返回 (事件名, 内容, 新位置)，没有新日志时返回 None
+
+    since 为该连接已推送到的 (清空次数, 行数)。客户端已有的行仍在缓冲内时只推送
+    之后的新行（logappend），否则推送完整日志（log）。
+    """
+    with _log_lock:
+        position = (_log_epoch, _log_count)
+        if since == position:
+            return None
+        first = _log_count - len(_log_sizes)
+        if since[0] == _log_epoch and 0 < since[1] and first <= since[1] < _log_count:
+            offset = sum(islice(_log_sizes, since[1] - first))
+            return b'logappend', b''.join((b'{"logs": "', _log_bytes[offset:-2], b'"}')), position
+        logs = _log_bytes[:-2]
+    content = b''.join((b'{"logs": "', logs, b'"}')) if logs else _EMPTY_LOGS_BYTES
+    return b'log', content, position
+
+
+def append_recent_log(line):
+    """记录一行日志到 recent_logs，同时追加到 /api/logs 的预编码缓冲"""
+    global _log_count
+    # 每行预先做好 JSON 转义和 UTF-8 编码，以转义后的 \\n 结尾
+    data = json.dumps(line, ensure_ascii=False)[1:-1].encode('utf-8') + b'\\n'
+    with _log_lock:
+        _log_count += 1
+        recent_logs.append(line)
+        _log_bytes.extend(data)
+        _log_sizes.append(len(data))
+        if len(_log_sizes) > recent_logs.maxlen:
+            del _log_bytes[:_log_sizes.popleft()]
+    notify_log_changed()
+
+
+def clear_recent_logs():
+    """清空 Web 显示用的日志"""
+    global _log_count, _log_epoch
+    with _log_lock:
+        _log_count = 0
+        _log_epoch += 1
+        recent_logs.clear()
+        _log_bytes.clear()
+        _log_sizes.clear()
+    notify_log_changed()
+
+
+def replace_config_values(block, values):
+    """单次扫描替换块内各键第一次出现的取值，values 为 {键: 已格式化的 TOML 值}"""
+    done = set()
+    
+    def replace(match):
+        key = match.group(2)
+        if key not in values or key in done:
+            return match.group(0)
+        done.add(key)
+        return match.group(1) + values[key]
+    
+    return _RE_KEY_VALUE.sub(replace, block)
+
+
+def toml_string(value):
+    """生成带引号的 TOML 基本字符串，转义反斜杠和引号（如 Windows 路径）"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def parse_config_settings(content):
+    """从配置文本中提取代理和第一个存储的设置，未找到的项为 None"""
+    config = tomllib.loads(content)
+    
+    proxy_table = config.get('telegram', {}).get('proxy', {})
+    enable = proxy_table.get('enable')
+    url = proxy_table.get('url')
+    proxy = {
+        'enable': enable if isinstance(enable, bool) else None,
+        'url': url if isinstance(url, str) and url else None,
+    }
+    
+    storage = None
+    storages = config.get('storages')
+    if isinstance(storages, list) and storages:
+        first = storages[0]
+        storage = {key: first.get(key) if isinstance(first.get(key), str) else None
+                   for key in ('name', 'type', 'base_path')}
+        enable = first.get('enable')
+        storage['enable'] = enable if isinstance(enable, bool) else None
+    
+    return {'proxy': proxy, 'storage': storage}
+
+
+# Web 监控页面，内容固定，导入时编码一次，每次请求直接写出
+_INDEX_HTML_BYTES = '''<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
@@ -303,13 +567,14 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
     
     <script>
         var logTimer = null;
+        var eventSource = null;
         
         function showTab(name) {
             document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
             document.querySelectorAll('.tab-content').forEach(c => c.classList.remove('active'));
             document.querySelector('.tab[onclick*="' + name + '"]').classList.add('active');
             document.getElementById(name).classList.add('active');
-            if (name === 'logs') { loadLogs(); if (!logTimer) logTimer = setInterval(loadLogs, 2000); }
+            if (name === 'logs') { loadLogs(); if (!logTimer && !eventSource) logTimer = setInterval(loadLogs, 2000); }
             else if (name === 'tasks') { loadTasks(); }
             else if (name === 'config') loadConfig();
         }
@@ -320,54 +585,69 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
             xhr.timeout = 5000;
             xhr.onreadystatechange = function() {
                 if (xhr.readyState === 4 && xhr.status === 200) {
-                    try {
-                        var data = JSON.parse(xhr.responseText);
-                        document.getElementById('status').textContent = data.status;
-                        document.getElementById('pid').textContent = data.pid;
-                        document.getElementById('uptime').textContent = data.uptime;
-                        document.getElementById('cpu').textContent = data.cpu + '%';
-                        document.getElementById('memory').textContent = data.memory;
-                        document.getElementById('threads').textContent = data.threads;
-                        document.getElementById('handles').textContent = data.handles;
-                        document.getElementById('downloadSpeed').textContent = data.download_speed;
-                        document.getElementById('uploadSpeed').textContent = data.upload_speed;
-                        document.getElementById('totalDownload').textContent = data.total_download;
-                        document.getElementById('totalUpload').textContent = data.total_upload;
-                        document.getElementById('sysDownload').textContent = data.sys_download;
-                        document.getElementById('sysUpload').textContent = data.sys_upload;
-                        document.getElementById('updateTime').textContent = data.last_update;
-                        var cpuBar = document.getElementById('cpuBar');
-                        cpuBar.style.width = Math.min(data.cpu, 100) + '%';
-                        cpuBar.className = 'progress-fill' + (data.cpu > 80 ? ' danger' : data.cpu > 50 ? ' warning' : '');
-                        var memBar = document.getElementById('memBar');
-                        memBar.style.width = Math.min(data.memory_percent, 100) + '%';
-                        memBar.className = 'progress-fill' + (data.memory_percent > 80 ? ' danger' : data.memory_percent > 50 ? ' warning' : '');
-                        var badge = document.getElementById('statusBadge');
-                        if (data.status.indexOf('运行中') >= 0) { badge.textContent = '运行中'; badge.className = 'status-badge status-running'; }
-                        else { badge.textContent = '未运行'; badge.className = 'status-badge status-stopped'; }
-                    } catch(e) {}
+                    try { renderStatus(JSON.parse(xhr.responseText)); } catch(e) {}
                 }
             };
             xhr.send();
         }
         
+        function renderStatus(data) {
+            document.getElementById('status').textContent = data.status;
+            document.getElementById('pid').textContent = data.pid;
+            document.getElementById('uptime').textContent = data.uptime;
+            document.getElementById('cpu').textContent = data.cpu + '%';
+            document.getElementById('memory').textContent = data.memory;
+            document.getElementById('threads').textContent = data.threads;
+            document.getElementById('handles').textContent = data.handles;
+            document.getElementById('downloadSpeed').textContent = data.download_speed;
+            document.getElementById('uploadSpeed').textContent = data.upload_speed;
+            document.getElementById('totalDownload').textContent = data.total_download;
+            document.getElementById('totalUpload').textContent = data.total_upload;
+            document.getElementById('sysDownload').textContent = data.sys_download;
+            document.getElementById('sysUpload').textContent = data.sys_upload;
+            document.getElementById('updateTime').textContent = data.last_update;
+            var cpuBar = document.getElementById('cpuBar');
+            cpuBar.style.width = Math.min(data.cpu, 100) + '%';
+            cpuBar.className = 'progress-fill' + (data.cpu > 80 ? ' danger' : data.cpu > 50 ? ' warning' : '');
+            var memBar = document.getElementById('memBar');
+            memBar.style.width = Math.min(data.memory_percent, 100) + '%';
+            memBar.className = 'progress-fill' + (data.memory_percent > 80 ? ' danger' : data.memory_percent > 50 ? ' warning' : '');
+            var badge = document.getElementById('statusBadge');
+            if (data.status.indexOf('运行中') >= 0) { badge.textContent = '运行中'; badge.className = 'status-badge status-running'; }
+            else { badge.textContent = '未运行'; badge.className = 'status-badge status-stopped'; }
+        }
+        
         function loadLogs() {
             var xhr = new XMLHttpRequest();
             xhr.open('GET', '/api/logs', true);
             xhr.timeout = 5000;
             xhr.onreadystatechange = function() {
                 if (xhr.readyState === 4 && xhr.status === 200) {
-                    try {
-                        var data = JSON.parse(xhr.responseText);
-                        var viewer = document.getElementById('logViewer');
-                        viewer.textContent = data.logs || '暂无日志';
-                        if (document.getElementById('autoScroll').checked) viewer.scrollTop = viewer.scrollHeight;
-                    } catch(e) {}
+                    try { renderLogs(JSON.parse(xhr.responseText)); } catch(e) {}
                 }
             };
             xhr.send();
         }
         
+        var logLines = [];
+        
+        function renderLogs(data) {
+            logLines = data.logs ? data.logs.split('\\n') : [];
+            showLogs();
+        }
+        
+        function appendLogs(data) {
+            logLines = logLines.concat(data.logs.split('\\n'));
+            if (logLines.length > 500) logLines = logLines.slice(logLines.length - 500);
+            showLogs();
+        }
+        
+        function showLogs() {
+            var viewer = document.getElementById('logViewer');
+            viewer.textContent = logLines.length ? logLines.join('\\n') : '暂无日志';
+            if (document.getElementById('autoScroll').checked) viewer.scrollTop = viewer.scrollHeight;
+        }
+        
         function clearLogs() { document.getElementById('logViewer').textContent = ''; }
         
         function loadConfig() {
@@ -462,47 +742,277 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
             xhr.send(JSON.stringify({ type: 'completed' }));
         }
         
-        updateStatus();
-        setInterval(updateStatus, 1000);
+        // 优先使用服务器推送，不支持 EventSource 的浏览器退回定时轮询
+        if (window.EventSource) {
+            eventSource = new EventSource('/api/events');
+            eventSource.addEventListener('status', function(e) { try { renderStatus(JSON.parse(e.data)); } catch(err) {} });
+            eventSource.addEventListener('log', function(e) { try { renderLogs(JSON.parse(e.data)); } catch(err) {} });
+            eventSource.addEventListener('logappend', function(e) { try { appendLogs(JSON.parse(e.data)); } catch(err) {} });
+        } else {
+            updateStatus();
+            setInterval(updateStatus, 1000);
+        }
     </script>
 </body>
-</html>'''
+</html>'''.encode('utf-8')
+_INDEX_HTML_GZ = gzip.compress(_INDEX_HTML_BYTES, 9)
+
+# 超过该大小的日志响应才做 gzip 压缩
+GZIP_MIN_SIZE = 2048
+
+# 固定响应的响应头模板，只需填入 Content-Length
+_JSON_HEADER_TMPL = (b'HTTP/1.1 200 OK\r\n'
+                     b'Content-Type: application/json; charset=utf-8\r\n'
+                     b'Content-Length: %d\r\n\r\n')
+# 带 ETag 的 JSON 响应，no-cache 让浏览器每次用 If-None-Match 重新验证
+_JSON_ETAG_HEADER_TMPL = (b'HTTP/1.1 200 OK\r\n'
+                          b'Content-Type: application/json; charset=utf-8\r\n'
+                          b'Cache-Control: no-cache\r\n'
+                          b'ETag: %s\r\n'
+                          b'Content-Length: %d\r\n\r\n')
+_NOT_MODIFIED_TMPL = b'HTTP/1.1 304 Not Modified\r\nETag: %s\r\n\r\n'
+_JSON_VARY_HEADER_TMPL = (b'HTTP/1.1 200 OK\r\n'
+                          b'Content-Type: application/json; charset=utf-8\r\n'
+                          b'Vary: Accept-Encoding\r\n'
+                          b'Content-Length: %d\r\n\r\n')
+_JSON_GZIP_HEADER_TMPL = (b'HTTP/1.1 200 OK\r\n'
+                          b'Content-Type: application/json; charset=utf-8\r\n'
+                          b'Vary: Accept-Encoding\r\n'
+                          b'Content-Encoding: gzip\r\n'
+                          b'Content-Length: %d\r\n\r\n')
+_HTML_HEADER_TMPL = (b'HTTP/1.1 200 OK\r\n'
+                     b'Content-Type: text/html; charset=utf-8\r\n'
+                     b'Vary: Accept-Encoding\r\n'
+                     b'%s'
+                     b'Content-Length: %d\r\n\r\n')
+# 首页的完整响应（响应头 + 正文），请求时一次写出
+_INDEX_HTML_RESPONSE = _HTML_HEADER_TMPL % (b'', len(_INDEX_HTML_BYTES)) + _INDEX_HTML_BYTES
+_INDEX_HTML_GZ_RESPONSE = (_HTML_HEADER_TMPL % (b'Content-Encoding: gzip\r\n', len(_INDEX_HTML_GZ))
+                           + _INDEX_HTML_GZ)
+
+
+class StoppableHTTPServer(ThreadingHTTPServer):
+    """可停止的 HTTP 服务器，针对 Windows Server 优化"""
+    
+    allow_reuse_address = True
+    daemon_threads = True
+    block_on_close = False
+    # listen 队列长度，默认 5 在多个标签页同时连接时容易被拒绝
+    request_queue_size = 128
+    # 同时处理的连接数上限，避免大量连接时线程暴涨
+    # 长连接会占用线程直到空闲超时，按每个浏览器约 6 个连接预留
+    max_workers = 32
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stop_event = threading.Event()
+        self._workers = threading.BoundedSemaphore(self.max_workers)
+        # stop() 向 _wake_w 写入一个字节即可唤醒阻塞中的 select，无需定时轮询
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.socket, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+    
+    def process_request(self, request, client_address):
+        """每个请求在独立线程中处理，超过上限时等待空闲线程"""
+        self._workers.acquire()
         try:
-            content = html.encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
-            self.end_headers()
-            self.wfile.write(content)
+            super().process_request(request, client_address)
         except Exception:
+            self._workers.release()
+            raise
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._workers.release()
+    
+    def serve_forever_stoppable(self):
+        """可停止的服务循环"""
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    events = self._selector.select()
+                except OSError:
+                    break
+                if any(key.fileobj is self._wake_r for key, _ in events):
+                    break
+                try:
+                    self._handle_request_noblock()
+                except OSError:
+                    break
+                except Exception:
+                    continue
+        finally:
+            self._selector.close()
+            self._wake_r.close()
+            self._wake_w.close()
+    
+    def stop(self):
+        """停止服务器"""
+        self._stop_event.set()
+        with _events_cond:
+            _events_cond.notify_all()
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
             pass
+        try:
+            self.socket.close()
+        except Exception:
+            pass
+
+
+class MonitorHTTPHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理器"""
+    
+    # HTTP/1.1 默认长连接，浏览器轮询可复用同一个连接；所有响应都带 Content-Length
+    protocol_version = 'HTTP/1.1'
+    timeout = 10
+    # 完全缓冲输出，响应头和正文合并为一次 send
+    wbufsize = -1
+    # 关闭 Nagle 算法，小响应不必等待对方的延迟 ACK
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def handle_one_request(self):
+        # 长连接上出错后结束连接，避免 handle() 继续在已断开的套接字上循环
+        try:
+            super().handle_one_request()
+        except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
+            self.close_connection = True
+        except socket.timeout:
+            self.close_connection = True
+        except Exception as e:
+            self.close_connection = True
+            self.report_error(e)
+    
+    def report_error(self, error):
+        """把请求处理中的异常写入程序日志"""
+        if web_error_callback:
+            # 请求行解析前出错时 command / path 尚未设置
+            request = f"{getattr(self, 'command', None) or '-'} {getattr(self, 'path', '-')}"
+            web_error_callback(f"Web 请求处理出错 {request}: {error!r}")
+    
+    def route_path(self):
+        """请求路径去掉查询字符串后的部分"""
+        path = self.path
+        end = path.find('?')
+        return path if end < 0 else path[:end]
+    
+    def do_GET(self):
+        try:
+            handler = self._GET_ROUTES.get(self.route_path())
+            if handler:
+                handler(self)
+            else:
+                self.send_error(404, "Not Found")
+        except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError, socket.timeout):
+            self.close_connection = True
+        except Exception as e:
+            # 响应可能只写出了一部分，不能继续复用这个连接
+            self.close_connection = True
+            self.report_error(e)
+    
+    def do_POST(self):
+        try:
+            handler = self._POST_ROUTES.get(self.route_path())
+            if handler:
+                handler(self)
+            else:
+                self.send_error(404, "Not Found")
+        except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError, socket.timeout):
+            self.close_connection = True
+        except Exception as e:
+            # 响应可能只写出了一部分，不能继续复用这个连接
+            self.close_connection = True
+            self.report_error(e)
+    
+    def accepts_gzip(self):
+        """客户端是否接受 gzip 编码"""
+        return 'gzip' in self.headers.get('Accept-Encoding', '')
+    
+    def send_html_page(self):
+        """发送 HTML 页面，响应头和正文均已预先生成"""
+        try:
+            if self.accepts_gzip():
+                self.wfile.write(_INDEX_HTML_GZ_RESPONSE)
+            else:
+                self.wfile.write(_INDEX_HTML_RESPONSE)
+        except Exception:
+            pass
+    
+    def write_fixed(self, template, body):
+        """用预生成的响应头模板，一次写出响应头和正文"""
+        self.wfile.write(template % len(body) + body)
+    
+    def write_tagged(self, etag, body):
+        """客户端缓存的 ETag 未过期时回复 304，否则发送带 ETag 的完整响应"""
+        if self.headers.get('If-None-Match') == etag.decode('ascii'):
+            self.wfile.write(_NOT_MODIFIED_TMPL % etag)
+        else:
+            self.wfile.write(_JSON_ETAG_HEADER_TMPL % (etag, len(body)) + body)
+    
+    def send_json(self, obj):
+        """序列化对象并用一次写入发送 JSON 响应"""
+        self.write_fixed(_JSON_HEADER_TMPL, json_dumps(obj))
     
     def send_json_status(self):
         try:
-            content = json.dumps(monitor_data, ensure_ascii=False).encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
-            self.end_headers()
-            self.wfile.write(content)
+            with _events_cond:
+                etag, content = _status_etag, _status_bytes
+            self.write_tagged(etag, content)
         except Exception:
             pass
     
     def send_logs(self):
         """发送日志内容"""
-        global recent_logs
         try:
-            logs_text = '\n'.join(recent_logs) if recent_logs else '暂无日志，请通过监控程序启动 SaveAny-Bot 以捕获日志'
-            result = {"logs": logs_text}
-            content = json.dumps(result, ensure_ascii=False).encode('utf-8')
+            content = build_logs_json()
+            if len(content) <= GZIP_MIN_SIZE or not self.accepts_gzip():
+                self.write_fixed(_JSON_VARY_HEADER_TMPL, content)
+                return
+            self.write_fixed(_JSON_GZIP_HEADER_TMPL, gzip.compress(content, 6))
+        except Exception:
+            pass
+    
+    def send_events(self):
+        """Server-Sent Events：状态或日志有更新时推送，空闲时定期发送心跳"""
+        # 事件流没有 Content-Length，结束后必须关闭连接
+        self.close_connection = True
+        try:
             self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache')
             self.send_header('Connection', 'close')
             self.end_headers()
-            self.wfile.write(content)
+            self.wfile.flush()
+            
+            sent_status = sent_log = -1
+            # 已推送到的日志位置，首次推送完整日志，之后只推送新行
+            log_position = (-1, -1)
+            while not self.server._stop_event.is_set():
+                with _events_cond:
+                    if sent_status == _status_version and sent_log == _log_version:
+                        _events_cond.wait(15)
+                    status_version, log_version = _status_version, _log_version
+                
+                chunks = []
+                if status_version != sent_status:
+                    chunks += (b'event: status\ndata: ', _status_bytes, b'\n\n')
+                if log_version != sent_log:
+                    log_event = build_log_event(log_position)
+                    if log_event:
+                        name, content, log_position = log_event
+                        chunks += (b'event: ', name, b'\ndata: ', content, b'\n\n')
+                if not chunks:
+                    chunks.append(b': ping\n\n')
+                self.wfile.write(b''.join(chunks))
+                self.wfile.flush()
+                sent_status, sent_log = status_version, log_version
         except Exception:
             pass
     
@@ -512,13 +1022,7 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
         try:
             tasks_list = list(download_tasks.values())
             result = {"tasks": tasks_list, "count": len(tasks_list)}
-            content = json.dumps(result, ensure_ascii=False).encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
-            self.end_headers()
-            self.wfile.write(content)
+            self.send_json(result)
         except Exception:
             pass
     
@@ -530,7 +1034,7 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
             content_length = int(self.headers.get('Content-Length', 0))
             if content_length > 0:
                 body = self.rfile.read(content_length)
-                data = json.loads(body.decode('utf-8'))
+                data = json_loads(body)
                 clear_type = data.get('type', 'completed')
             else:
                 clear_type = 'completed'
@@ -547,43 +1051,40 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
                 del download_tasks[filename]
             
             result = {"success": True, "cleared": len(to_remove)}
-            content = json.dumps(result, ensure_ascii=False).encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
-            self.end_headers()
-            self.wfile.write(content)
+            self.send_json(result)
         except Exception as e:
             result = {"success": False, "error": str(e)}
-            content = json.dumps(result, ensure_ascii=False).encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
-            self.end_headers()
-            self.wfile.write(content)
+            self.send_json(result)
     
     def send_config(self):
-        global config_path
+        global config_path, _config_response
         result = {"success": False, "content": "", "error": ""}
+        content = None
+        etag = None
         try:
             if config_path and os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    result["content"] = f.read()
+                # 文件未变化时直接复用上次生成的响应
+                key, text = read_config_text(config_path)
+                etag = b'"%x-%x"' % key[1:]
+                cached_key, cached = _config_response
+                if cached_key == key:
+                    content = cached
+                else:
+                    result["content"] = text
                     result["success"] = True
+                    content = json_dumps(result)
+                    _config_response = (key, content)
             else:
                 result["error"] = "配置文件不存在"
         except Exception as e:
             result["error"] = str(e)
+            content = None
         try:
-            content = json.dumps(result, ensure_ascii=False).encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
-            self.end_headers()
-            self.wfile.write(content)
+            if content is None:
+                content = json_dumps(result)
+                self.write_fixed(_JSON_HEADER_TMPL, content)
+            else:
+                self.write_tagged(etag, content)
         except Exception:
             pass
     
@@ -594,23 +1095,18 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
             content_length = int(self.headers.get('Content-Length', 0))
             if content_length > 0:
                 post_data = self.rfile.read(content_length)
-                data = json.loads(post_data.decode('utf-8'))
+                data = json_loads(post_data)
                 if config_path:
-                    with open(config_path, 'w', encoding='utf-8') as f:
+                    with open(config_path, 'w', encoding='utf-8', buffering=CONFIG_IO_BUFSIZE) as f:
                         f.write(data['content'])
+                    invalidate_config_cache()
                     result["success"] = True
                 else:
                     result["error"] = "配置文件路径未设置"
         except Exception as e:
             result["error"] = str(e)
         try:
-            content = json.dumps(result, ensure_ascii=False).encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
-            self.end_headers()
-            self.wfile.write(content)
+            self.send_json(result)
         except Exception:
             pass
     
@@ -621,7 +1117,7 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
             content_length = int(self.headers.get('Content-Length', 0))
             if content_length > 0:
                 post_data = self.rfile.read(content_length)
-                data = json.loads(post_data.decode('utf-8'))
+                data = json_loads(post_data)
                 action = data.get('action', '')
                 if control_callback:
                     result["message"] = control_callback(action)
@@ -631,15 +1127,25 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
         except Exception as e:
             result["message"] = str(e)
         try:
-            content = json.dumps(result, ensure_ascii=False).encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
-            self.end_headers()
-            self.wfile.write(content)
+            self.send_json(result)
         except Exception:
             pass
+    
+    # 路径到处理方法的映射，按路径直接查表分发
+    _GET_ROUTES = {
+        '/': send_html_page,
+        '/index.html': send_html_page,
+        '/api/status': send_json_status,
+        '/api/config': send_config,
+        '/api/logs': send_logs,
+        '/api/tasks': send_tasks,
+        '/api/events': send_events,
+    }
+    _POST_ROUTES = {
+        '/api/config': save_config,
+        '/api/control': handle_control,
+        '/api/tasks/clear': clear_tasks,
+    }
 
 
 class SaveAnyMonitor:
@@ -659,25 +1165,75 @@ class SaveAnyMonitor:
         self.update_interval = 1000
         
         self.net_history = deque(maxlen=60)
+        # 物理内存总量运行期间不变，只查询一次
+        self._total_mem = psutil.virtual_memory().total
+        # 采样计数，用于降低慢变字段的采样频率
+        self._sample_tick = 0
+        # 进程刚出现或监控页刚切回前台时置位，下一次采样立即查询句柄数，不等慢采样节拍
+        self._handles_stale = True
+        # 监控/日志标签页是否在前台，由 Notebook 切换事件更新，采样线程只读
+        self._monitor_tab_visible = True
+        self._log_tab_visible = False
+        # 监控标签当前显示的文本和进度条的值，用于跳过未变化的更新
+        self._label_values = {}
+        # 状态标签的显示样式，只在状态切换时重新设置
+        self._status_styles = {
+            "running": {"text": "运行中", "foreground": "green"},
+            "stopped": {"text": "未运行", "foreground": "red"},
+        }
+        self._current_status = None
         self.last_net_io = None
         self.last_net_time = None
         self.proc_last_io = None
         self.proc_last_time = None
+        # (psutil.Process, win_counters.ProcessIoCounters)，Windows 上按进程缓存 IO 计数读取器
+        self._io_reader = (None, None)
+        # (进程名, psutil.Process)，find_process 找到目标进程后复用
+        self._proc_cache = (None, None)
+        # (PID, 启动时刻的单调时钟纳秒值)，运行时长按单调时钟计算
+        self._proc_start = (None, 0)
+        # (程序路径, 所在目录)，target_path 不变时复用目录
+        self._target_dir = (None, "")
+        # 采样线程写入、UI 线程读取的最新状态快照
+        self.latest_status = None
+        # 其他线程提交给界面线程执行的回调 (func, args)，由 update_ui 每次刷新时统一执行
+        self._ui_calls = deque()
+        # 读取线程解析到任务变化后置位，由 update_ui 在界面线程刷新任务列表
+        self._tasks_dirty = False
+        self.shown_status = None
+        self.found_exe_path = None
         
         self.web_server = None
+        # 配置编辑器当前内容对应的配置文件缓存键，文件未变化时重新加载可直接跳过
+        self._editor_config_key = None
+        # 局域网 IP 探测结果，探测成功后在本次运行期间复用
+        self._cached_ip = None
         self.web_thread = None
         self.web_port = 8080
         
         # 日志相关
-        self.log_queue = queue.Queue()
+        # 读取线程 append，UI 线程 popleft；_log_event 表示有新日志待显示
+        # 超过日志框容量的积压日志反正会被裁剪掉，队列满时直接丢弃最旧的行
+        self.log_queue = deque(maxlen=CONSOLE_MAX_LINES)
+        self._log_event = threading.Event()
+        self._log_idle_ticks = 0
+        # 程序日志先放入 _log_pending，合并后一次插入监控页的日志框
+        self._log_pending = deque(maxlen=LOG_TEXT_MAX_LINES)
+        self._log_flush_scheduled = False
+        self._log_text_lines = 0
         self.log_file = None
         self.log_file_path = None
+        # 读取线程写入日志文件、界面线程定时 flush，两者通过锁互斥
+        self._log_file_lock = threading.Lock()
+        self._log_file_dirty = False
+        self._log_flush_time = 0.0
         self.capture_logs = True
         
-        global config_path, control_callback, recent_logs
+        global config_path, control_callback, web_error_callback
         config_path = None
         control_callback = self.handle_web_control
-        recent_logs = deque(maxlen=500)
+        web_error_callback = self.report_web_error
+        clear_recent_logs()
         
         self.create_widgets()
         self.start_monitoring()
@@ -687,6 +1243,7 @@ class SaveAnyMonitor:
     def create_widgets(self):
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         # 监控页面
         monitor_frame = ttk.Frame(self.notebook, padding="10")
@@ -731,11 +1288,13 @@ class SaveAnyMonitor:
         self.status_label.pack(side=tk.LEFT, padx=(5, 20))
         
         ttk.Label(status_row, text="PID:").pack(side=tk.LEFT)
-        self.pid_label = ttk.Label(status_row, text="-")
+        self.pid_var = tk.StringVar(value="-")
+        self.pid_label = ttk.Label(status_row, textvariable=self.pid_var)
         self.pid_label.pack(side=tk.LEFT, padx=(5, 20))
         
         ttk.Label(status_row, text="运行时长:").pack(side=tk.LEFT)
-        self.uptime_label = ttk.Label(status_row, text="-")
+        self.uptime_var = tk.StringVar(value="-")
+        self.uptime_label = ttk.Label(status_row, textvariable=self.uptime_var)
         self.uptime_label.pack(side=tk.LEFT)
         
         # 资源占用
@@ -745,26 +1304,33 @@ class SaveAnyMonitor:
         cpu_row = ttk.Frame(resource_frame)
         cpu_row.pack(fill=tk.X, pady=(0, 5))
         ttk.Label(cpu_row, text="CPU 使用率:", width=12).pack(side=tk.LEFT)
-        self.cpu_progress = ttk.Progressbar(cpu_row, length=300, mode='determinate')
+        # 进度条绑定整数变量，取整后数值不变时不产生 Tcl 调用
+        self.cpu_pct_var = tk.IntVar(value=0)
+        self.cpu_progress = ttk.Progressbar(cpu_row, length=300, mode='determinate', variable=self.cpu_pct_var)
         self.cpu_progress.pack(side=tk.LEFT, padx=(5, 10))
-        self.cpu_label = ttk.Label(cpu_row, text="0%", width=8)
+        self.cpu_var = tk.StringVar(value="0%")
+        self.cpu_label = ttk.Label(cpu_row, textvariable=self.cpu_var, width=8)
         self.cpu_label.pack(side=tk.LEFT)
         
         mem_row = ttk.Frame(resource_frame)
         mem_row.pack(fill=tk.X, pady=(0, 5))
         ttk.Label(mem_row, text="内存使用:", width=12).pack(side=tk.LEFT)
-        self.mem_progress = ttk.Progressbar(mem_row, length=300, mode='determinate')
+        self.mem_pct_var = tk.IntVar(value=0)
+        self.mem_progress = ttk.Progressbar(mem_row, length=300, mode='determinate', variable=self.mem_pct_var)
         self.mem_progress.pack(side=tk.LEFT, padx=(5, 10))
-        self.mem_label = ttk.Label(mem_row, text="0 MB", width=8)
+        self.mem_var = tk.StringVar(value="0 MB")
+        self.mem_label = ttk.Label(mem_row, textvariable=self.mem_var, width=8)
         self.mem_label.pack(side=tk.LEFT)
         
         thread_row = ttk.Frame(resource_frame)
         thread_row.pack(fill=tk.X)
         ttk.Label(thread_row, text="线程数:", width=12).pack(side=tk.LEFT)
-        self.thread_label = ttk.Label(thread_row, text="-")
+        self.thread_var = tk.StringVar(value="-")
+        self.thread_label = ttk.Label(thread_row, textvariable=self.thread_var)
         self.thread_label.pack(side=tk.LEFT, padx=(5, 20))
         ttk.Label(thread_row, text="句柄数:").pack(side=tk.LEFT)
-        self.handle_label = ttk.Label(thread_row, text="-")
+        self.handle_var = tk.StringVar(value="-")
+        self.handle_label = ttk.Label(thread_row, textvariable=self.handle_var)
         self.handle_label.pack(side=tk.LEFT)
         
         # 网络流量
@@ -774,19 +1340,23 @@ class SaveAnyMonitor:
         download_row = ttk.Frame(network_frame)
         download_row.pack(fill=tk.X, pady=(0, 5))
         ttk.Label(download_row, text="下载速度:", width=12).pack(side=tk.LEFT)
-        self.download_label = ttk.Label(download_row, text="0 KB/s", font=("Microsoft YaHei", 10))
+        self.download_var = tk.StringVar(value="0 KB/s")
+        self.download_label = ttk.Label(download_row, textvariable=self.download_var, font=("Microsoft YaHei", 10))
         self.download_label.pack(side=tk.LEFT, padx=(5, 20))
         ttk.Label(download_row, text="总下载:").pack(side=tk.LEFT)
-        self.total_download_label = ttk.Label(download_row, text="0 MB")
+        self.total_download_var = tk.StringVar(value="0 MB")
+        self.total_download_label = ttk.Label(download_row, textvariable=self.total_download_var)
         self.total_download_label.pack(side=tk.LEFT)
         
         upload_row = ttk.Frame(network_frame)
         upload_row.pack(fill=tk.X)
         ttk.Label(upload_row, text="上传速度:", width=12).pack(side=tk.LEFT)
-        self.upload_label = ttk.Label(upload_row, text="0 KB/s", font=("Microsoft YaHei", 10))
+        self.upload_var = tk.StringVar(value="0 KB/s")
+        self.upload_label = ttk.Label(upload_row, textvariable=self.upload_var, font=("Microsoft YaHei", 10))
         self.upload_label.pack(side=tk.LEFT, padx=(5, 20))
         ttk.Label(upload_row, text="总上传:").pack(side=tk.LEFT)
-        self.total_upload_label = ttk.Label(upload_row, text="0 MB")
+        self.total_upload_var = tk.StringVar(value="0 MB")
+        self.total_upload_label = ttk.Label(upload_row, textvariable=self.total_upload_var)
         self.total_upload_label.pack(side=tk.LEFT)
         
         # 系统网络
@@ -796,12 +1366,29 @@ class SaveAnyMonitor:
         sys_net_row = ttk.Frame(sys_network_frame)
         sys_net_row.pack(fill=tk.X)
         ttk.Label(sys_net_row, text="系统下载:", width=12).pack(side=tk.LEFT)
-        self.sys_download_label = ttk.Label(sys_net_row, text="0 KB/s")
+        self.sys_download_var = tk.StringVar(value="0 KB/s")
+        self.sys_download_label = ttk.Label(sys_net_row, textvariable=self.sys_download_var)
         self.sys_download_label.pack(side=tk.LEFT, padx=(5, 20))
         ttk.Label(sys_net_row, text="系统上传:").pack(side=tk.LEFT)
-        self.sys_upload_label = ttk.Label(sys_net_row, text="0 KB/s")
+        self.sys_upload_var = tk.StringVar(value="0 KB/s")
+        self.sys_upload_label = ttk.Label(sys_net_row, textvariable=self.sys_upload_var)
         self.sys_upload_label.pack(side=tk.LEFT)
         
+        # 直接显示采样字段的标签变量，render_status 按表循环更新
+        self._status_label_fields = (
+            (self.pid_var, "pid"),
+            (self.uptime_var, "uptime"),
+            (self.mem_var, "memory"),
+            (self.thread_var, "threads"),
+            (self.handle_var, "handles"),
+            (self.download_var, "download_speed"),
+            (self.upload_var, "upload_speed"),
+            (self.total_download_var, "total_download"),
+            (self.total_upload_var, "total_upload"),
+            (self.sys_download_var, "sys_download"),
+            (self.sys_upload_var, "sys_upload"),
+        )
+        
         # 控制按钮
         control_frame = ttk.LabelFrame(parent, text="控制", padding="10")
         control_frame.pack(fill=tk.X, pady=(0, 10))
@@ -830,7 +1417,8 @@ class SaveAnyMonitor:
         log_frame = ttk.LabelFrame(parent, text="最近日志", padding="5")
         log_frame.pack(fill=tk.BOTH, expand=True)
         
-        self.log_text = tk.Text(log_frame, height=4, wrap=tk.WORD, font=("Consolas", 9))
+        self.log_text = tk.Text(log_frame, height=4, wrap=tk.WORD, font=("Consolas", 9),
+                                undo=False, autoseparators=False)
         self.log_text.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
         scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -839,6 +1427,19 @@ class SaveAnyMonitor:
         self.log("SaveAny-Bot Monitor v2.5 已启动")
         self.log(f"正在监控进程: {self.target_process}")
     
+    def on_tab_changed(self, event=None):
+        """记录当前显示的标签页，后台只采集和显示可见页面需要的数据"""
+        current = self.notebook.index('current')
+        if current == 0 and not self._monitor_tab_visible:
+            self._handles_stale = True
+        self._monitor_tab_visible = current == 0
+        self._log_tab_visible = current == 1
+        # 切换到日志页/监控页时立即显示切换前积压的日志
+        if self._log_tab_visible and self._log_event.is_set():
+            self.show_console_logs()
+        elif self._monitor_tab_visible and self._log_pending:
+            self.flush_status_log()
+    
     def create_log_tab(self, parent):
         """创建日志标签页"""
         # 说明
@@ -879,10 +1480,14 @@ class SaveAnyMonitor:
             font=("Consolas", 9),
             bg='#1e1e1e',
             fg='#d4d4d4',
-            insertbackground='white'
+            insertbackground='white',
+            undo=False,
+            autoseparators=False
         )
         self.console_log.pack(fill=tk.BOTH, expand=True)
         self.console_log.insert(tk.END, "等待 SaveAny-Bot 启动...\n提示: 请通过本监控程序的「启动进程」按钮启动 SaveAny-Bot 以捕获日志\n")
+        # 日志框当前行数由插入和删除时自行计数，不必每次向 Tk 查询 index
+        self._console_line_count = 2
     
     def create_tasks_tab(self, parent):
         """创建下载任务列表标签页"""
@@ -978,7 +1583,8 @@ class SaveAnyMonitor:
         editor_frame = ttk.Frame(parent)
         editor_frame.pack(fill=tk.BOTH, expand=True)
         
-        self.config_editor = scrolledtext.ScrolledText(editor_frame, wrap=tk.NONE, font=("Consolas", 10), undo=True)
+        self.config_editor = scrolledtext.ScrolledText(editor_frame, wrap=tk.NONE, font=("Consolas", 10),
+                                                       undo=True, maxundo=CONFIG_EDITOR_MAX_UNDO)
         self.config_editor.pack(fill=tk.BOTH, expand=True)
         
         h_scrollbar = ttk.Scrollbar(editor_frame, orient=tk.HORIZONTAL, command=self.config_editor.xview)
@@ -1129,148 +1735,208 @@ base_path = "Z:/sp/uuu"""
         ttk.Label(tips_frame, text=tips_text, justify=tk.LEFT).pack(fill=tk.X)
     
     def log(self, message):
+        """记录一条程序日志；LOG_TEXT_FLUSH_DELAY 内的多条日志合并为一次插入"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        lines = int(self.log_text.index('end-1c').split('.')[0])
-        if lines > 100:
-            self.log_text.delete('1.0', '2.0')
+        self._log_pending.append(f"[{timestamp}] {message}")
+        if not self._log_flush_scheduled:
+            self._log_flush_scheduled = True
+            self.root.after(LOG_TEXT_FLUSH_DELAY, self.flush_status_log)
+    
+    def flush_status_log(self):
+        """把待显示的程序日志整批插入日志框；监控页不可见时留到切换回监控页再插入"""
+        self._log_flush_scheduled = False
+        pending = self._log_pending
+        if not pending or not self._monitor_tab_visible:
+            return
+        text = '\n'.join([pending.popleft() for _ in range(len(pending))]) + '\n'
+        log_text = self.log_text
+        log_text.insert(tk.END, text)
+        lines = self._log_text_lines + text.count('\n')
+        if lines > LOG_TEXT_MAX_LINES:
+            log_text.delete('1.0', f'{lines - LOG_TEXT_MAX_LINES + 1}.0')
+            lines = LOG_TEXT_MAX_LINES
+        self._log_text_lines = lines
+        log_text.see(tk.END)
     
     def add_console_log(self, message):
         """添加控制台日志"""
-        global recent_logs, download_tasks
+        self.add_console_logs([message])
+    
+    def add_console_logs(self, messages):
+        """批量添加控制台日志，同一批共用一个时间戳，日志文件只写入一次并按时间间隔刷新"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_line = f"[{timestamp}] {message}"
+        log_lines = [f"[{timestamp}] {message}" for message in messages]
         
-        # 添加到全局日志队列（用于Web显示）
-        recent_logs.append(log_line)
+        for message, log_line in zip(messages, log_lines):
+            # 添加到全局日志队列（用于Web显示）
+            append_recent_log(log_line)
+            # 解析日志提取下载任务信息
+            self.parse_download_task(message)
         
-        # 解析日志提取下载任务信息
-        self.parse_download_task(message)
-        
-        # 写入日志文件
+        # 写入日志文件；距上次 flush 不足 LOG_FLUSH_INTERVAL 时先留在缓冲区
         if self.log_file:
-            try:
-                self.log_file.write(log_line + '\n')
-                self.log_file.flush()
-            except Exception:
-                pass
+            with self._log_file_lock:
+                try:
+                    self.log_file.write('\n'.join(log_lines) + '\n')
+                    now = time.monotonic()
+                    if now - self._log_flush_time >= LOG_FLUSH_INTERVAL:
+                        self.log_file.flush()
+                        self._log_flush_time = now
+                        self._log_file_dirty = False
+                    else:
+                        self._log_file_dirty = True
+                except Exception:
+                    pass
         
         # 添加到队列等待UI更新
-        self.log_queue.put(log_line)
+        self.log_queue.extend(log_lines)
+        self._log_event.set()
     
     def process_log_queue(self):
-        """处理日志队列，更新UI"""
-        try:
-            while True:
-                log_line = self.log_queue.get_nowait()
-                self.console_log.insert(tk.END, log_line + '\n')
-                if self.auto_scroll_var.get():
-                    self.console_log.see(tk.END)
-                # 限制显示行数
-                lines = int(self.console_log.index('end-1c').split('.')[0])
-                if lines > 2000:
-                    self.console_log.delete('1.0', '500.0')
-        except queue.Empty:
-            pass
+        """处理日志队列，更新UI
+
+        日志页不可见时日志留在队列中（队列长度与日志框容量相同，不会丢失可见内容），
+        切换到日志页时再整批插入，后台不做任何 Text 控件操作。
+        """
+        if self._log_event.is_set() and self._log_tab_visible:
+            self.show_console_logs()
+            self._log_idle_ticks = 0
+        else:
+            self._log_idle_ticks += 1
+        
+        if self._log_file_dirty:
+            self.flush_log_file()
         
         if self.running:
-            self.root.after(100, self.process_log_queue)
+            # 连续空闲时降低检查频率
+            delay = 100 if self._log_idle_ticks < 5 else 500
+            self.root.after(delay, self.process_log_queue)
+    
+    def show_console_logs(self):
+        """把队列中待显示的日志整批插入日志框"""
+        # 先清除标志再取数据，取数据期间新到的日志会重新置位
+        self._log_event.clear()
+        # 只取出开始时已在队列中的日志，读取线程持续写入时也不会一直取下去；
+        # deque 的 popleft 本身是原子的，不需要加锁，也不能整体替换队列（读取线程可能仍持有旧队列）
+        popleft = self.log_queue.popleft
+        batch = [popleft() for _ in range(len(self.log_queue))]
+        if batch:
+            console = self.console_log
+            # 整批日志一次插入
+            console.insert(tk.END, '\n'.join(batch) + '\n')
+            # 限制显示行数，超过上限时才删除
+            lines = self._console_line_count + len(batch)
+            if lines > CONSOLE_MAX_LINES:
+                console.delete('1.0', f'{lines - CONSOLE_KEEP_LINES + 1}.0')
+                lines = CONSOLE_KEEP_LINES
+            self._console_line_count = lines
+            if self.auto_scroll_var.get():
+                console.see(tk.END)
+    
+    def flush_log_file(self):
+        """把缓冲区中尚未刷新的日志写入日志文件"""
+        with self._log_file_lock:
+            if self.log_file and self._log_file_dirty:
+                try:
+                    self.log_file.flush()
+                except Exception:
+                    pass
+                self._log_file_dirty = False
+                self._log_flush_time = time.monotonic()
+    
+    def close_log_file(self):
+        """关闭日志文件，缓冲区中的日志随 close 一并写入"""
+        with self._log_file_lock:
+            if self.log_file:
+                try:
+                    self.log_file.close()
+                except Exception:
+                    pass
+                self.log_file = None
+                self._log_file_dirty = False
     
     def parse_download_task(self, message):
-        """解析日志提取下载任务信息"""
+        """解析日志提取下载任务信息；在输出读取线程中运行，不直接操作界面"""
         global download_tasks
-        import re
         
         try:
-            # 解析任务开始: Processing task: d60bg6hcbfigvi5mp0ig
-            task_match = re.search(r'Processing task: (\w+)', message)
-            if task_match:
-                task_id = task_match.group(1)
-                if task_id not in download_tasks:
-                    download_tasks[task_id] = {
-                        'task_id': task_id,
-                        'filename': '',
-                        'downloaded': 0,
-                        'total': 0,
-                        'progress': 0,
-                        'status': '处理中',
-                        'start_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                # 更新任务列表 UI
-                self.update_tasks_ui()
-                return
-            
-            # 解析文件开始下载: file[文件名]: Starting file download
-            start_match = re.search(r'file\[(.+?)\]: Starting file download', message)
-            if start_match:
-                filename = start_match.group(1)
-                # 查找最近的任务并更新文件名
-                for task_id in reversed(list(download_tasks.keys())):
-                    if not download_tasks[task_id]['filename']:
-                        download_tasks[task_id]['filename'] = filename
-                        download_tasks[task_id]['status'] = '下载中'
-                        break
-                # 更新任务列表 UI
-                self.update_tasks_ui()
+            # 任务开始、文件开始下载、进度更新三种日志用一个合并的正则一次扫描识别
+            event = _RE_TASK_EVENT.search(message)
+            if event:
+                task_id = event.group('task_id')
+                if task_id:
+                    # 任务开始: Processing task: d60bg6hcbfigvi5mp0ig
+                    if task_id not in download_tasks:
+                        download_tasks[task_id] = {
+                            'task_id': task_id,
+                            'filename': '',
+                            'downloaded': 0,
+                            'total': 0,
+                            'progress': 0,
+                            'status': '处理中',
+                            'start_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        }
+                elif event.group('start_file'):
+                    # 文件开始下载: file[文件名]: Starting file download
+                    filename = event.group('start_file')
+                    # 查找最近的任务并更新文件名
+                    for task in reversed(list(download_tasks.values())):
+                        if not task['filename']:
+                            task['filename'] = filename
+                            task['status'] = '下载中'
+                            break
+                else:
+                    # 进度更新: Progress update: 文件名, 已下载/总大小
+                    filename = event.group('progress_file')
+                    downloaded = int(event.group('downloaded'))
+                    total = int(event.group('total'))
+                    progress = (downloaded / total * 100) if total > 0 else 0
+                    
+                    # 查找对应的任务并更新
+                    for task in list(download_tasks.values()):
+                        if task['filename'] == filename:
+                            task['downloaded'] = downloaded
+                            task['total'] = total
+                            task['progress'] = round(progress, 1)
+                            task['status'] = '下载中'
+                            break
+                # 任务列表由界面线程刷新
+                self._tasks_dirty = True
                 return
             
-            # 解析进度更新: Progress update: 文件名, 已下载/总大小
-            progress_match = re.search(r'Progress update: (.+?), (\d+)/(\d+)', message)
-            if progress_match:
-                filename = progress_match.group(1)
-                downloaded = int(progress_match.group(2))
-                total = int(progress_match.group(3))
-                progress = (downloaded / total * 100) if total > 0 else 0
-                
-                # 查找对应的任务并更新
-                for task_id, task in download_tasks.items():
-                    if task['filename'] == filename:
-                        download_tasks[task_id]['downloaded'] = downloaded
-                        download_tasks[task_id]['total'] = total
-                        download_tasks[task_id]['progress'] = round(progress, 1)
-                        download_tasks[task_id]['status'] = '下载中'
-                        break
-                # 更新任务列表 UI
-                self.update_tasks_ui()
-                return
+            lower_message = message.lower()
             
             # 解析下载完成: file downloaded successfully 或 upload completed
-            if 'downloaded successfully' in message or 'upload completed' in message or 'completed' in message.lower():
+            if 'completed' in lower_message or 'downloaded successfully' in message:
                 # 尝试提取文件名
-                complete_match = re.search(r'file\[(.+?)\].*(?:downloaded successfully|completed)', message)
+                complete_match = _RE_TASK_COMPLETE.search(message)
                 if complete_match:
                     filename = complete_match.group(1)
                     for task_id, task in list(download_tasks.items()):
                         if task['filename'] == filename:
-                            download_tasks[task_id]['status'] = '已完成'
-                            download_tasks[task_id]['progress'] = 100
+                            task['status'] = '已完成'
+                            task['progress'] = 100
                             # 30秒后移除已完成的任务
-                            self.root.after(30000, lambda tid=task_id: self.remove_completed_task(tid))
+                            self.call_in_ui(self.root.after, 30000, lambda tid=task_id: self.remove_completed_task(tid))
                             break
-                # 更新任务列表 UI
-                self.update_tasks_ui()
+                # 任务列表由界面线程刷新
+                self._tasks_dirty = True
                 return
             
             # 解析任务失败或取消
-            if 'failed' in message.lower() or 'error' in message.lower() or 'canceled' in message.lower() or 'cancelled' in message.lower():
-                # 检查是否是取消操作
-                is_canceled = 'canceled' in message.lower() or 'cancelled' in message.lower() or 'context canceled' in message.lower()
-                
-                error_match = re.search(r'file\s*\[(.+?)\]', message)
+            is_canceled = 'canceled' in lower_message or 'cancelled' in lower_message
+            if is_canceled or 'failed' in lower_message or 'error' in lower_message:
+                error_match = _RE_TASK_FILE.search(message)
                 if error_match:
                     filename = error_match.group(1)
                     for task_id, task in list(download_tasks.items()):
                         if task['filename'] == filename:
-                            if is_canceled:
-                                download_tasks[task_id]['status'] = '已取消'
-                            else:
-                                download_tasks[task_id]['status'] = '失败'
+                            task['status'] = '已取消' if is_canceled else '失败'
                             # 30秒后移除失败/取消的任务
-                            self.root.after(30000, lambda tid=task_id: self.remove_finished_task(tid))
+                            self.call_in_ui(self.root.after, 30000, lambda tid=task_id: self.remove_finished_task(tid))
                             break
-                # 更新任务列表 UI
-                self.update_tasks_ui()
+                # 任务列表由界面线程刷新
+                self._tasks_dirty = True
                 return
                 
         except Exception:
@@ -1289,15 +1955,16 @@ base_path = "Z:/sp/uuu"""
     
     def update_tasks_ui(self):
         """更新任务列表 UI"""
-        global download_tasks
         try:
+            # 读取线程可能同时增删任务，先取一份快照再遍历
+            tasks = list(download_tasks.values())
             if hasattr(self, 'tasks_tree'):
                 # 清空现有项
                 for item in self.tasks_tree.get_children():
                     self.tasks_tree.delete(item)
                 
                 # 添加任务
-                for task_id, task in download_tasks.items():
+                for task in tasks:
                     downloaded_str = self.format_bytes(task['downloaded']) if task['downloaded'] else '-'
                     total_str = self.format_bytes(task['total']) if task['total'] else '-'
                     progress_str = f"{task['progress']:.1f}%" if task['progress'] else '0%'
@@ -1313,19 +1980,20 @@ base_path = "Z:/sp/uuu"""
                 
                 # 更新任务计数
                 if hasattr(self, 'tasks_count_label'):
-                    active_count = sum(1 for t in download_tasks.values() if t['status'] in ['处理中', '下载中'])
-                    self.tasks_count_label.config(text=f"当前任务: {len(download_tasks)} 个 (活跃: {active_count})")
+                    active_count = sum(1 for t in tasks if t['status'] in ['处理中', '下载中'])
+                    self.tasks_count_label.config(text=f"当前任务: {len(tasks)} 个 (活跃: {active_count})")
         except Exception:
             pass
     
     def clear_console_log(self):
         """清空控制台日志显示"""
         self.console_log.delete('1.0', tk.END)
+        self._console_line_count = 0
     
     def open_log_folder(self):
         """打开日志文件夹"""
         if self.target_path:
-            log_dir = os.path.join(os.path.dirname(self.target_path), "logs")
+            log_dir = os.path.join(self.target_dir(), "logs")
             if os.path.exists(log_dir):
                 if sys.platform == 'win32':
                     os.startfile(log_dir)
@@ -1336,202 +2004,328 @@ base_path = "Z:/sp/uuu"""
         else:
             messagebox.showwarning("警告", "请先选择 SaveAny-Bot 程序路径")
     
+    def cached_process(self):
+        """返回缓存中仍在运行的目标进程，缓存失效时返回 None，不遍历进程"""
+        cached_name, cached_proc = self._proc_cache
+        if cached_proc is not None and cached_name == self.target_process.lower():
+            # is_running() 同时比较创建时间，PID 被复用时会返回 False
+            if cached_proc.is_running():
+                return cached_proc
+        return None
+    
+    def target_dir(self):
+        """返回 SaveAny-Bot 程序所在目录；target_path 有多处赋值，按路径缓存而不是在每处同步"""
+        path, directory = self._target_dir
+        if path != self.target_path:
+            directory = os.path.dirname(self.target_path)
+            self._target_dir = (self.target_path, directory)
+        return directory
+    
     def find_process(self):
-        for proc in psutil.process_iter(['pid', 'name', 'exe']):
+        """查找目标进程；找到后缓存 Process 对象，进程仍在运行时不再遍历全部进程"""
+        cached_proc = self.cached_process()
+        if cached_proc is not None:
+            return cached_proc
+        
+        target = self.target_process.lower()
+        for proc in psutil.process_iter(['pid', 'name']):
             try:
-                if proc.info['name'] and proc.info['name'].lower() == self.target_process.lower():
+                name = proc.info['name']
+                if name and name.lower() == target:
+                    self._proc_cache = (target, proc)
                     return proc
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 continue
+        self._proc_cache = (target, None)
         return None
     
     def format_bytes(self, bytes_value):
-        if bytes_value < 1024:
-            return f"{bytes_value} B"
-        elif bytes_value < 1024 * 1024:
-            return f"{bytes_value / 1024:.1f} KB"
-        elif bytes_value < 1024 * 1024 * 1024:
-            return f"{bytes_value / (1024 * 1024):.1f} MB"
-        else:
-            return f"{bytes_value / (1024 * 1024 * 1024):.2f} GB"
+        """按单位表格式化字节数，参数为整数"""
+        i = min((bytes_value.bit_length() - 1) // 10, 3) if bytes_value > 0 else 0
+        return _BYTES_FORMATS[i] % (bytes_value / _UNIT_SCALES[i] if i else bytes_value)
     
     def format_speed(self, bytes_per_sec):
-        if bytes_per_sec < 1024:
-            return f"{bytes_per_sec:.0f} B/s"
-        elif bytes_per_sec < 1024 * 1024:
-            return f"{bytes_per_sec / 1024:.1f} KB/s"
-        else:
-            return f"{bytes_per_sec / (1024 * 1024):.2f} MB/s"
+        """按单位表格式化每秒字节数，参数为整数"""
+        i = min((bytes_per_sec.bit_length() - 1) // 10, 2) if bytes_per_sec > 0 else 0
+        return _SPEED_FORMATS[i] % (bytes_per_sec / _UNIT_SCALES[i] if i else bytes_per_sec)
     
     def format_uptime(self, seconds):
+        seconds = int(seconds)
         if seconds < 60:
-            return f"{int(seconds)}秒"
-        elif seconds < 3600:
-            return f"{int(seconds // 60)}分{int(seconds % 60)}秒"
-        elif seconds < 86400:
-            return f"{int(seconds // 3600)}时{int((seconds % 3600) // 60)}分"
-        else:
-            return f"{int(seconds // 86400)}天{int((seconds % 86400) // 3600)}时"
-    
-    def update_ui(self):
+            return f"{seconds}秒"
+        minutes, seconds = divmod(seconds, 60)
+        if minutes < 60:
+            return f"{minutes}分{seconds}秒"
+        hours, minutes = divmod(minutes, 60)
+        if hours < 24:
+            return f"{hours}时{minutes}分"
+        days, hours = divmod(hours, 24)
+        return f"{days}天{hours}时"
+    
+    def set_var_text(self, var, text):
+        """仅在文本变化时设置标签绑定的 StringVar，减少每秒刷新时的 Tcl 调用
+
+        Tk 变量不可哈希，缓存以变量名（str(var)）为键。
+        """
+        name = str(var)
+        if self._label_values.get(name) != text:
+            var.set(text)
+            self._label_values[name] = text
+    
+    def set_progress_value(self, var, value):
+        """进度条按整数百分比显示，取整后与上次相同时不设置绑定的 IntVar"""
+        value = round(value)
+        name = str(var)
+        if self._label_values.get(name) != value:
+            var.set(value)
+            self._label_values[name] = value
+    
+    def set_status_state(self, state):
+        """运行状态发生变化时才更新状态标签"""
+        if state != self._current_status:
+            self.status_label.config(**self._status_styles[state])
+            self._current_status = state
+    
+    def process_start_time(self, proc, sample_time, wall_time):
+        """进程启动时刻换算到单调时钟（纳秒），每个 PID 只查询一次 create_time"""
+        if self._proc_start[0] != proc.pid:
+            started_ago = max(0, wall_time - proc.create_time())
+            self._proc_start = (proc.pid, sample_time - int(started_ago * 1_000_000_000))
+        return self._proc_start[1]
+    
+    def read_process_io(self, proc, info):
+        """返回进程累计 (读取字节数, 写入字节数)，取不到时返回 None
+
+        Windows 上为每个进程打开一次句柄，之后每次采样只调用一次 GetProcessIoCounters；
+        其他平台使用 as_dict 取到的 io_counters。
+        """
+        if not win_counters.AVAILABLE:
+            counters = info.get("io_counters")
+            return None if counters is None else (counters.read_bytes, counters.write_bytes)
+        
+        cached_proc, reader = self._io_reader
+        if cached_proc is not proc:
+            # 进程变化（重启或 PID 变化）时关闭旧进程的句柄
+            self.close_io_reader()
+            try:
+                reader = win_counters.ProcessIoCounters(proc.pid)
+            except OSError:
+                reader = None
+            self._io_reader = (proc, reader)
+        if reader is None:
+            return None
+        try:
+            return reader.read()
+        except OSError:
+            return None
+    
+    def close_io_reader(self):
+        """关闭缓存的 IO 计数读取器持有的进程句柄"""
+        reader = self._io_reader[1]
+        self._io_reader = (None, None)
+        if reader is not None:
+            reader.close()
+    
+    def sample_status(self):
+        """采集一次进程和系统网络状态并更新 monitor_data，在采样线程中运行，不访问 Tk 控件"""
         global monitor_data
         
-        if not self.running:
-            return
+        sample = {}
+        # 本次采样统一使用同一个时间点；速率计算用单调时钟（纳秒整数），不受系统校时影响
+        sample_time = time.monotonic_ns()
+        wall_time = time.time()
+        proc = self.find_process()
+        slow_tick = self._sample_tick % SLOW_SAMPLE_EVERY == 0
+        self._sample_tick += 1
         
-        try:
-            proc = self.find_process()
-            
-            if proc:
-                try:
-                    self.status_label.config(text="运行中", foreground="green")
-                    self.pid_label.config(text=str(proc.pid))
-                    monitor_data["status"] = "运行中"
-                    monitor_data["pid"] = str(proc.pid)
+        if proc:
+            try:
+                # as_dict 内部使用 oneshot，一次取齐所有字段；无权限的字段返回 None
+                # 句柄数每 SLOW_SAMPLE_EVERY 次采样查询一次，且只在监控页可见或 Web 服务运行时查询，
+                # 其余采样沿用上次的值
+                # 进程刚出现或监控页刚切回时也立即查询一次
+                if ((slow_tick or self._handles_stale)
+                        and (self._monitor_tab_visible or self.web_server is not None)):
+                    attrs = PROCESS_SAMPLE_ATTRS
+                    self._handles_stale = False
+                else:
+                    attrs = PROCESS_SAMPLE_ATTRS_NO_HANDLES
+                info = proc.as_dict(attrs=attrs, ad_value=None)
+                mem_info = info["memory_info"]
+                mem_mb = mem_info.rss / (1024 * 1024)
+                
+                sample.update({
+                    "status": "运行中",
+                    "pid": str(proc.pid),
+                    "uptime": self.format_uptime((sample_time - self.process_start_time(proc, sample_time, wall_time)) // 1_000_000_000),
+                    "cpu": round(info["cpu_percent"], 1),
+                    "memory": f"{mem_mb:.1f} MB",
+                    "memory_percent": round(mem_info.rss * 100 / self._total_mem, 1),
+                    "threads": str(info["num_threads"]),
+                })
+                if "num_handles" in info:
+                    num_handles = info["num_handles"]
+                    sample["handles"] = "N/A" if num_handles is None else str(num_handles)
+                elif not HAS_NUM_HANDLES:
+                    sample["handles"] = "N/A"
+                
+                # exe() 不在 oneshot 的缓存范围内，只在还不知道程序路径时查询
+                if not self.target_path:
+                    self.found_exe_path = proc.exe()
+                
+                io_counters = self.read_process_io(proc, info)
+                if io_counters is not None:
+                    read_bytes, write_bytes = io_counters
+                    if self.proc_last_io and self.proc_last_time:
+                        time_diff = sample_time - self.proc_last_time
+                        if time_diff > 0:
+                            last_read, last_write = self.proc_last_io
+                            read_speed = (read_bytes - last_read) * 1_000_000_000 // time_diff
+                            write_speed = (write_bytes - last_write) * 1_000_000_000 // time_diff
+                            sample["download_speed"] = self.format_speed(max(0, read_speed))
+                            sample["upload_speed"] = self.format_speed(max(0, write_speed))
                     
-                    with proc.oneshot():
-                        cpu_percent = proc.cpu_percent()
-                        self.cpu_progress['value'] = min(cpu_percent, 100)
-                        self.cpu_label.config(text=f"{cpu_percent:.1f}%")
-                        monitor_data["cpu"] = round(cpu_percent, 1)
-                        
-                        mem_info = proc.memory_info()
-                        mem_mb = mem_info.rss / (1024 * 1024)
-                        total_mem = psutil.virtual_memory().total
-                        mem_percent = (mem_info.rss / total_mem) * 100
-                        self.mem_progress['value'] = min(mem_percent, 100)
-                        self.mem_label.config(text=f"{mem_mb:.1f} MB")
-                        monitor_data["memory"] = f"{mem_mb:.1f} MB"
-                        monitor_data["memory_percent"] = round(mem_percent, 1)
-                        
-                        num_threads = proc.num_threads()
-                        self.thread_label.config(text=str(num_threads))
-                        monitor_data["threads"] = str(num_threads)
-                        
-                        try:
-                            num_handles = proc.num_handles()
-                            self.handle_label.config(text=str(num_handles))
-                            monitor_data["handles"] = str(num_handles)
-                        except AttributeError:
-                            self.handle_label.config(text="N/A")
-                            monitor_data["handles"] = "N/A"
-                        
-                        create_time = proc.create_time()
-                        uptime = time.time() - create_time
-                        uptime_str = self.format_uptime(uptime)
-                        self.uptime_label.config(text=uptime_str)
-                        monitor_data["uptime"] = uptime_str
-                        
-                        exe_path = proc.exe()
-                        if exe_path and not self.target_path:
-                            self.target_path = exe_path
-                            self.path_label.config(text=exe_path)
-                            self.update_config_path()
-                        
-                        try:
-                            io_counters = proc.io_counters()
-                            current_time = time.time()
-                            
-                            if self.proc_last_io and self.proc_last_time:
-                                time_diff = current_time - self.proc_last_time
-                                if time_diff > 0:
-                                    read_speed = (io_counters.read_bytes - self.proc_last_io.read_bytes) / time_diff
-                                    write_speed = (io_counters.write_bytes - self.proc_last_io.write_bytes) / time_diff
-                                    
-                                    dl_speed = self.format_speed(max(0, read_speed))
-                                    ul_speed = self.format_speed(max(0, write_speed))
-                                    self.download_label.config(text=dl_speed)
-                                    self.upload_label.config(text=ul_speed)
-                                    monitor_data["download_speed"] = dl_speed
-                                    monitor_data["upload_speed"] = ul_speed
-                            
-                            total_dl = self.format_bytes(io_counters.read_bytes)
-                            total_ul = self.format_bytes(io_counters.write_bytes)
-                            self.total_download_label.config(text=total_dl)
-                            self.total_upload_label.config(text=total_ul)
-                            monitor_data["total_download"] = total_dl
-                            monitor_data["total_upload"] = total_ul
-                            
-                            self.proc_last_io = io_counters
-                            self.proc_last_time = current_time
-                        except (psutil.AccessDenied, AttributeError):
-                            pass
+                    # 累计流量同样降频显示，进程刚出现时立即显示一次
+                    if slow_tick or self.proc_last_io is None:
+                        sample["total_download"] = self.format_bytes(read_bytes)
+                        sample["total_upload"] = self.format_bytes(write_bytes)
                     
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    self.set_offline_status()
-            else:
-                self.set_offline_status()
+                    self.proc_last_io = io_counters
+                    self.proc_last_time = sample_time
+            except (psutil.NoSuchProcess, psutil.AccessDenied, TypeError, AttributeError):
+                proc = None
+        
+        if not proc:
+            sample = dict(_OFFLINE_MONITOR_DATA)
+            self.proc_last_io = None
+            self.proc_last_time = None
+            self._handles_stale = True
+            # 进程已退出，不再持有它的句柄
+            if self._io_reader[1] is not None:
+                self.close_io_reader()
+        
+        try:
+            net_io = psutil.net_io_counters()
             
+            if self.last_net_io and self.last_net_time:
+                time_diff = sample_time - self.last_net_time
+                if time_diff > 0:
+                    download_speed = (net_io.bytes_recv - self.last_net_io.bytes_recv) * 1_000_000_000 // time_diff
+                    upload_speed = (net_io.bytes_sent - self.last_net_io.bytes_sent) * 1_000_000_000 // time_diff
+                    sample["sys_download"] = self.format_speed(max(0, download_speed))
+                    sample["sys_upload"] = self.format_speed(max(0, upload_speed))
+            
+            self.last_net_io = net_io
+            self.last_net_time = sample_time
+        except Exception:
+            pass
+        
+        sample["last_update"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall_time))
+        # 每次采样生成新的快照整体替换，未采集的字段沿用上一次的值；
+        # Web 序列化和 UI 线程共用同一个快照，无需再复制
+        monitor_data = replace(monitor_data, **sample)
+        publish_status()
+        self.latest_status = monitor_data
+    
+    def sample_loop(self):
+        """采样线程：按固定节拍采集状态，与界面刷新和 Web 请求解耦
+
+        界面和 /api/status 只读取采样结果，不会额外触发采样。下一次采样时间按
+        节拍计算，不随采样耗时漂移；两次采样之间至少间隔 MIN_SAMPLE_INTERVAL。
+        """
+        interval = self.update_interval / 1000
+        sample_status = self.sample_status
+        sleep = time.sleep
+        monotonic = time.monotonic
+        next_sample = monotonic()
+        while self.running:
             try:
-                net_io = psutil.net_io_counters()
-                current_time = time.time()
-                
-                if self.last_net_io and self.last_net_time:
-                    time_diff = current_time - self.last_net_time
-                    if time_diff > 0:
-                        download_speed = (net_io.bytes_recv - self.last_net_io.bytes_recv) / time_diff
-                        upload_speed = (net_io.bytes_sent - self.last_net_io.bytes_sent) / time_diff
-                        
-                        sys_dl = self.format_speed(max(0, download_speed))
-                        sys_ul = self.format_speed(max(0, upload_speed))
-                        self.sys_download_label.config(text=sys_dl)
-                        self.sys_upload_label.config(text=sys_ul)
-                        monitor_data["sys_download"] = sys_dl
-                        monitor_data["sys_upload"] = sys_ul
-                
-                self.last_net_io = net_io
-                self.last_net_time = current_time
-            except Exception:
-                pass
+                sample_status()
+            except Exception as e:
+                self.call_in_ui(self.log, f"更新错误: {str(e)}")
+            now = monotonic()
+            next_sample = max(next_sample + interval, now + MIN_SAMPLE_INTERVAL)
+            sleep(next_sample - now)
+    
+    def update_ui(self):
+        """用采样线程的最新结果刷新监控标签页，并执行其他线程提交的界面操作
+
+        按 UI_REFRESH_INTERVAL 的固定节拍运行，与采样节拍无关：新快照最多延迟
+        一个刷新间隔显示，快照未变化时只做一次比较。
+        """
+        if not self.running:
+            return
+        
+        ui_calls = self._ui_calls
+        while ui_calls:
+            func, args = ui_calls.popleft()
+            try:
+                func(*args)
+            except Exception as e:
+                self.log(f"界面更新错误: {str(e)}")
+        
+        if self._tasks_dirty:
+            self._tasks_dirty = False
+            self.update_tasks_ui()
+        
+        try:
+            data = self.latest_status
+            if data is not None and data is not self.shown_status:
+                self.shown_status = data
+                self.render_status(data)
             
-            monitor_data["last_update"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
+            exe_path = self.found_exe_path
+            if exe_path and not self.target_path:
+                self.target_path = exe_path
+                self.path_label.config(text=exe_path)
+                self.update_config_path()
         except Exception as e:
             self.log(f"更新错误: {str(e)}")
         
         if self.running:
-            self.root.after(self.update_interval, self.update_ui)
-    
-    def set_offline_status(self):
-        global monitor_data
-        
-        self.status_label.config(text="未运行", foreground="red")
-        self.pid_label.config(text="-")
-        self.uptime_label.config(text="-")
-        self.cpu_progress['value'] = 0
-        self.cpu_label.config(text="0%")
-        self.mem_progress['value'] = 0
-        self.mem_label.config(text="0 MB")
-        self.thread_label.config(text="-")
-        self.handle_label.config(text="-")
-        self.download_label.config(text="0 KB/s")
-        self.upload_label.config(text="0 KB/s")
-        self.total_download_label.config(text="0 MB")
-        self.total_upload_label.config(text="0 MB")
-        self.proc_last_io = None
-        self.proc_last_time = None
+            self.root.after(UI_REFRESH_INTERVAL, self.update_ui)
+    
+    def report_web_error(self, message):
+        """供 Web 服务线程调用：把请求处理异常记录到程序日志"""
+        self.call_in_ui(self.log, message)
+    
+    def call_in_ui(self, func, *args):
+        """供工作线程调用：把界面操作交给界面线程执行，不在工作线程中调用 Tk"""
+        self._ui_calls.append((func, args))
+    
+    def render_status(self, data):
+        """将一次采样结果显示到监控标签页"""
+        # 每秒调用，常用方法先绑定到局部变量
+        set_text = self.set_var_text
+        set_progress = self.set_progress_value
+        if data.status == "运行中":
+            cpu = data.cpu
+            self.set_status_state("running")
+            set_progress(self.cpu_pct_var, min(cpu, 100))
+            set_text(self.cpu_var, f"{cpu:.1f}%")
+            set_progress(self.mem_pct_var, min(data.memory_percent, 100))
+        else:
+            self.set_status_state("stopped")
+            set_progress(self.cpu_pct_var, 0)
+            set_text(self.cpu_var, "0%")
+            set_progress(self.mem_pct_var, 0)
         
-        monitor_data.update({
-            "status": "未运行", "pid": "-", "uptime": "-", "cpu": 0,
-            "memory": "0 MB", "memory_percent": 0, "threads": "-", "handles": "-",
-            "download_speed": "0 KB/s", "upload_speed": "0 KB/s",
-            "total_download": "0 MB", "total_upload": "0 MB"
-        })
+        for var, key in self._status_label_fields:
+            set_text(var, getattr(data, key))
     
     def start_monitoring(self):
+        threading.Thread(target=self.sample_loop, daemon=True).start()
         self.update_ui()
     
     def update_config_path(self):
         global config_path
         if self.target_path:
-            dir_path = os.path.dirname(self.target_path)
-            cfg_path = os.path.join(dir_path, "config.toml")
+            cfg_path = os.path.join(self.target_dir(), "config.toml")
             config_path = cfg_path
             self.config_path_label.config(text=cfg_path, foreground="black")
             if os.path.exists(cfg_path):
-                self.load_config()
-                # 如果启用了自动加载，则加载设置
-                self.auto_load_settings_on_startup()
+                # 配置读取完成后，如果启用了自动加载，则加载设置
+                self.load_config(on_loaded=self.auto_load_settings_on_startup)
     
     def browse_exe(self):
         filepath = filedialog.askopenfilename(
@@ -1561,7 +2355,7 @@ base_path = "Z:/sp/uuu"""
             return
         
         try:
-            work_dir = os.path.dirname(self.target_path)
+            work_dir = self.target_dir()
             
             # 创建日志目录
             log_dir = os.path.join(work_dir, "logs")
@@ -1573,33 +2367,16 @@ base_path = "Z:/sp/uuu"""
             self.log_file = open(self.log_file_path, 'w', encoding='utf-8')
             self.log_path_label.config(text=self.log_file_path, foreground="green")
             
-            # 启动进程，捕获输出
-            if sys.platform == 'win32':
-                # Windows: 使用 STARTUPINFO 隐藏窗口
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-                
-                self.managed_process = subprocess.Popen(
-                    [self.target_path],
-                    cwd=work_dir,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    startupinfo=startupinfo,
-                    bufsize=1,
-                    universal_newlines=True,
-                    encoding='utf-8',
-                    errors='replace'
-                )
-            else:
-                self.managed_process = subprocess.Popen(
-                    [self.target_path],
-                    cwd=work_dir,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    bufsize=1,
-                    universal_newlines=True
-                )
+            # 启动进程，捕获输出；Windows 下使用 STARTUPINFO 隐藏窗口
+            # bufsize=0 时 stdout 为无缓冲的原始管道，读取线程直接从管道读入自己的缓冲区
+            self.managed_process = subprocess.Popen(
+                [self.target_path],
+                cwd=work_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0,
+                startupinfo=BOT_STARTUPINFO
+            )
             
             self.log(f"正在启动进程: {self.target_path}")
             self.log(f"日志文件: {self.log_file_path}")
@@ -1613,22 +2390,58 @@ base_path = "Z:/sp/uuu"""
             output_thread = threading.Thread(target=self.read_process_output, daemon=True)
             output_thread.start()
             
+            # 通过 after 轮询确认进程没有立即退出，不阻塞界面
+            self.root.after(100, self._check_started, self.managed_process)
+            
         except Exception as e:
             messagebox.showerror("错误", f"启动失败: {str(e)}")
             self.log(f"启动失败: {str(e)}")
     
+    def _check_started(self, process, attempt=0):
+        """启动后约 2 秒内每 100ms 检查一次进程是否已退出"""
+        return_code = process.poll()
+        if return_code is None:
+            if attempt < 20:
+                self.root.after(100, self._check_started, process, attempt + 1)
+            else:
+                self.log(f"进程已启动，PID: {process.pid}")
+            return
+        self.log(f"启动失败，进程已退出，返回码: {return_code}")
+        messagebox.showerror("启动失败", f"进程启动后立即退出，返回码: {return_code}\n请查看控制台输出")
+    
     def read_process_output(self):
         """读取进程输出"""
         if not self.managed_process:
             return
         
         try:
-            for line in iter(self.managed_process.stdout.readline, ''):
-                if not self.running:
+            # stdout 是无缓冲的原始管道，readinto 直接把管道数据读入预先分配的缓冲区，
+            # 读取期间释放 GIL，不经过 BufferedReader 的二次拷贝，也不为每次读取分配新的 bytes；
+            # 未完整的行留在 pending 中；完整的部分整体解码一次再按行切分，整批交给 add_console_logs
+            stdout = self.managed_process.stdout
+            read_buf = bytearray(OUTPUT_READ_SIZE)
+            read_view = memoryview(read_buf)
+            pending = bytearray()
+            while self.running:
+                n = stdout.readinto(read_buf)
+                if not n:
                     break
-                line = line.rstrip('\n\r')
-                if line:
-                    self.add_console_log(line)
+                pending += read_view[:n]
+                end = pending.rfind(b'\n')
+                if end < 0:
+                    continue
+                text = pending[:end].decode('utf-8', 'replace')
+                del pending[:end + 1]
+                lines = text.split('\n')
+                if '\r' in text:
+                    lines = [line.rstrip('\r') for line in lines]
+                batch = list(filter(None, lines))
+                if batch:
+                    self.add_console_logs(batch)
+            
+            tail = pending.decode('utf-8', 'replace').rstrip('\r')
+            if tail:
+                self.add_console_log(tail)
             
             # 进程结束
             self.managed_process.stdout.close()
@@ -1639,12 +2452,38 @@ base_path = "Z:/sp/uuu"""
             self.add_console_log(f"读取输出错误: {str(e)}")
         finally:
             self.managed_process = None
-            if self.log_file:
-                try:
-                    self.log_file.close()
-                except Exception:
-                    pass
-                self.log_file = None
+            self.close_log_file()
+    
+    def terminate_process(self, proc, timeout=5):
+        """结束进程及其子进程，超时后强制终止；返回是否使用了强制终止"""
+        try:
+            children = proc.children(recursive=True)
+        except psutil.Error:
+            children = []
+        
+        # 常见情况没有子进程，直接 terminate + wait，不走 wait_procs
+        if not children:
+            proc.terminate()
+            try:
+                proc.wait(timeout=timeout)
+                return False
+            except psutil.TimeoutExpired:
+                proc.kill()
+                return True
+        
+        for child in children:
+            try:
+                child.terminate()
+            except psutil.NoSuchProcess:
+                pass
+        proc.terminate()
+        gone, alive = psutil.wait_procs([proc] + children, timeout=timeout)
+        for p in alive:
+            try:
+                p.kill()
+            except psutil.NoSuchProcess:
+                pass
+        return bool(alive)
     
     def stop_process(self):
         proc = self.find_process()
@@ -1654,14 +2493,11 @@ base_path = "Z:/sp/uuu"""
         
         if messagebox.askyesno("确认", "确定要停止 SaveAny-Bot 进程吗？"):
             try:
-                proc.terminate()
                 self.log("已发送停止信号")
-                try:
-                    proc.wait(timeout=5)
-                    self.log("进程已停止")
-                except psutil.TimeoutExpired:
-                    proc.kill()
+                if self.terminate_process(proc):
                     self.log("进程已强制终止")
+                else:
+                    self.log("进程已停止")
             except Exception as e:
                 messagebox.showerror("错误", f"停止失败: {str(e)}")
                 self.log(f"停止失败: {str(e)}")
@@ -1674,23 +2510,39 @@ base_path = "Z:/sp/uuu"""
                     self.target_path = proc.exe()
                 
                 proc.terminate()
-                try:
-                    proc.wait(timeout=5)
-                except psutil.TimeoutExpired:
-                    proc.kill()
-                
-                self.log("进程已停止，正在重启...")
-                time.sleep(1)
-                self.start_process()
+                self.log("已发送停止信号，等待进程退出...")
             except Exception as e:
                 messagebox.showerror("错误", f"重启失败: {str(e)}")
                 self.log(f"重启失败: {str(e)}")
+                return
+            self._restart_when_stopped(proc)
         else:
             self.start_process()
     
+    def _restart_when_stopped(self, proc, attempt=0):
+        """每 100ms 检查旧进程是否退出，超过 5 秒强制结束，退出后再启动，不阻塞界面"""
+        try:
+            running = proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            running = False
+        
+        if running:
+            if attempt == 50:
+                try:
+                    proc.kill()
+                    self.log("进程已强制终止")
+                except psutil.NoSuchProcess:
+                    pass
+            if attempt < 60:
+                self.root.after(100, self._restart_when_stopped, proc, attempt + 1)
+                return
+        
+        self.log("进程已停止，正在重启...")
+        self.root.after(1000, self.start_process)
+    
     def open_folder(self):
         if self.target_path and os.path.exists(self.target_path):
-            folder = os.path.dirname(self.target_path)
+            folder = self.target_dir()
             if sys.platform == 'win32':
                 os.startfile(folder)
             else:
@@ -1709,7 +2561,11 @@ base_path = "Z:/sp/uuu"""
             else:
                 messagebox.showwarning("警告", "请先选择程序或等待进程运行")
     
-    def load_config(self):
+    def load_config(self, on_loaded=None):
+        """在后台线程读取并解析配置文件，完成后回到界面线程填入编辑器
+
+        on_loaded 在配置成功显示后调用，此时解析结果已在缓存中，可直接读取。
+        """
         global config_path
         if not config_path:
             if self.target_path:
@@ -1724,15 +2580,39 @@ base_path = "Z:/sp/uuu"""
             self.config_editor.insert('1.0', f"# 配置文件不存在: {config_path}")
             return
         
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+        path = config_path
+        
+        def read_in_background():
+            try:
+                key, content = read_config_text(path)
+            except Exception as e:
+                self.call_in_ui(lambda msg=str(e): self.config_status.config(text=f"加载失败: {msg}", foreground="red"))
+                return
+            try:
+                # 顺便解析一次，随后加载代理/存储设置时直接命中缓存
+                read_config_parsed(path)
+            except Exception:
+                pass
+            self.call_in_ui(self._show_loaded_config, path, key, content, on_loaded)
+        
+        threading.Thread(target=read_in_background, daemon=True).start()
+    
+    def _show_loaded_config(self, path, key, content, on_loaded):
+        """将后台读取的配置内容填入编辑器，期间配置路径已切换时丢弃结果"""
+        if path != config_path:
+            return
+        # 文件没有变化且编辑器内容未修改时，跳过整段文本的删除和重新插入
+        if key != self._editor_config_key or self.config_editor.edit_modified():
             self.config_editor.delete('1.0', tk.END)
             self.config_editor.insert('1.0', content)
-            self.config_status.config(text=f"配置已加载: {config_path}", foreground="green")
-            self.log(f"已加载配置文件: {config_path}")
-        except Exception as e:
-            self.config_status.config(text=f"加载失败: {str(e)}", foreground="red")
+            self.config_editor.edit_modified(False)
+            # 载入文件本身不作为可撤销的编辑，同时释放上一份内容的撤销记录
+            self.config_editor.edit_reset()
+            self._editor_config_key = key
+        self.config_status.config(text=f"配置已加载: {path}", foreground="green")
+        self.log(f"已加载配置文件: {path}")
+        if on_loaded:
+            on_loaded()
     
     def save_config(self):
         global config_path
@@ -1743,15 +2623,8 @@ base_path = "Z:/sp/uuu"""
         content = self.config_editor.get('1.0', tk.END)
         
         try:
-            if os.path.exists(config_path):
-                backup_path = config_path + ".bak"
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    backup_content = f.read()
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    f.write(backup_content)
-            
-            with open(config_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_config_with_backup(config_path, content)
+            self._editor_config_key = None
             
             self.config_status.config(text=f"配置已保存: {config_path}", foreground="green")
             self.log(f"配置已保存到: {config_path}")
@@ -1825,13 +2698,16 @@ base_path = "Z:/sp/uuu"""
         webbrowser.open(f"http://127.0.0.1:{self.web_port}")
     
     def get_local_ip(self):
+        """获取局域网 IP，成功后缓存；探测失败时返回 127.0.0.1，下次启动再重试"""
+        if self._cached_ip:
+            return self._cached_ip
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except Exception:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                # UDP connect 不发包也不会阻塞，只查询路由表得到本机出口地址，不经过 DNS
+                s.connect(("8.8.8.8", 80))
+                self._cached_ip = s.getsockname()[0]
+            return self._cached_ip
+        except OSError:
             return "127.0.0.1"
     
     def handle_web_control(self, action):
@@ -1840,8 +2716,8 @@ base_path = "Z:/sp/uuu"""
                 return "进程已在运行中"
             if not self.target_path:
                 return "请先在桌面程序中选择 SaveAny-Bot 程序路径"
-            # 使用 root.after 在主线程中启动
-            self.root.after(0, self.start_process)
+            # 交给界面线程启动
+            self.call_in_ui(self.start_process)
             return "启动命令已发送"
         
         elif action == 'stop':
@@ -1849,11 +2725,7 @@ base_path = "Z:/sp/uuu"""
             if not proc:
                 return "进程未在运行"
             try:
-                proc.terminate()
-                try:
-                    proc.wait(timeout=5)
-                except psutil.TimeoutExpired:
-                    proc.kill()
+                self.terminate_process(proc)
                 return "进程已停止"
             except Exception as e:
                 return f"停止失败: {str(e)}"
@@ -1864,18 +2736,14 @@ base_path = "Z:/sp/uuu"""
                 try:
                     if not self.target_path:
                         self.target_path = proc.exe()
-                    proc.terminate()
-                    try:
-                        proc.wait(timeout=5)
-                    except psutil.TimeoutExpired:
-                        proc.kill()
-                    time.sleep(1)
+                    self.terminate_process(proc)
                 except Exception as e:
                     return f"停止失败: {str(e)}"
             
             if not self.target_path:
                 return "请先在桌面程序中选择 SaveAny-Bot 程序路径"
-            self.root.after(0, self.start_process)
+            # 留 1 秒让旧进程释放资源，由界面线程设置 Tk 定时器启动，不占用请求线程
+            self.call_in_ui(self.root.after, 1000 if proc else 0, self.start_process)
             return "重启命令已发送"
         
         return "未知操作"
@@ -1892,12 +2760,11 @@ base_path = "Z:/sp/uuu"""
         
         def do_test():
             try:
-                import re
                 # 解析 SOCKS5 URL: socks5://[user:pass@]host:port
                 pattern = r'socks5://(?:([^:]+):([^@]+)@)?([^:]+):(\d+)'
                 match = re.match(pattern, proxy_url)
                 if not match:
-                    self.root.after(0, lambda: self.proxy_status_label.config(text="URL 格式错误", foreground="red"))
+                    self.call_in_ui(lambda: self.proxy_status_label.config(text="URL 格式错误", foreground="red"))
                     return
                 
                 username = match.group(1)
@@ -1922,7 +2789,7 @@ base_path = "Z:/sp/uuu"""
                 response = sock.recv(2)
                 if len(response) < 2 or response[0] != 0x05:
                     sock.close()
-                    self.root.after(0, lambda: self.proxy_status_label.config(text="代理响应错误", foreground="red"))
+                    self.call_in_ui(lambda: self.proxy_status_label.config(text="代理响应错误", foreground="red"))
                     return
                 
                 auth_method = response[1]
@@ -1934,11 +2801,11 @@ base_path = "Z:/sp/uuu"""
                     auth_response = sock.recv(2)
                     if len(auth_response) < 2 or auth_response[1] != 0x00:
                         sock.close()
-                        self.root.after(0, lambda: self.proxy_status_label.config(text="认证失败", foreground="red"))
+                        self.call_in_ui(lambda: self.proxy_status_label.config(text="认证失败", foreground="red"))
                         return
                 elif auth_method == 0xFF:
                     sock.close()
-                    self.root.after(0, lambda: self.proxy_status_label.config(text="代理拒绝连接", foreground="red"))
+                    self.call_in_ui(lambda: self.proxy_status_label.config(text="代理拒绝连接", foreground="red"))
                     return
                 
                 elapsed = (time.time() - start_time) * 1000
@@ -1952,14 +2819,14 @@ base_path = "Z:/sp/uuu"""
                 else:
                     color = "red"
                 
-                self.root.after(0, lambda: self.proxy_status_label.config(text=f"连接成功 ({elapsed:.0f}ms)", foreground=color))
+                self.call_in_ui(lambda: self.proxy_status_label.config(text=f"连接成功 ({elapsed:.0f}ms)", foreground=color))
                 
             except socket.timeout:
-                self.root.after(0, lambda: self.proxy_status_label.config(text="连接超时", foreground="red"))
+                self.call_in_ui(lambda: self.proxy_status_label.config(text="连接超时", foreground="red"))
             except ConnectionRefusedError:
-                self.root.after(0, lambda: self.proxy_status_label.config(text="连接被拒绝", foreground="red"))
+                self.call_in_ui(lambda: self.proxy_status_label.config(text="连接被拒绝", foreground="red"))
             except Exception as e:
-                self.root.after(0, lambda: self.proxy_status_label.config(text=f"错误: {str(e)[:20]}", foreground="red"))
+                self.call_in_ui(lambda msg=str(e)[:20]: self.proxy_status_label.config(text=f"错误: {msg}", foreground="red"))
         
         threading.Thread(target=do_test, daemon=True).start()
     
@@ -1971,22 +2838,7 @@ base_path = "Z:/sp/uuu"""
             return
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 解析 [telegram.proxy] 部分
-            import re
-            
-            # 查找 enable
-            enable_match = re.search(r'\[telegram\.proxy\][\s\S]*?enable\s*=\s*(true|false)', content, re.IGNORECASE)
-            if enable_match:
-                self.proxy_enable_var.set(enable_match.group(1).lower() == 'true')
-            
-            # 查找 url
-            url_match = re.search(r'\[telegram\.proxy\][\s\S]*?url\s*=\s*["\']([^"\']+)["\']', content)
-            if url_match:
-                self.proxy_url_entry.delete(0, tk.END)
-                self.proxy_url_entry.insert(0, url_match.group(1))
+            self._apply_proxy_settings(read_config_parsed(config_path)[1]['proxy'])
             
             self.settings_status.config(text="代理设置已从配置文件加载", foreground="green")
             self.log("已加载代理设置")
@@ -2001,50 +2853,34 @@ base_path = "Z:/sp/uuu"""
             return
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = read_config_text(config_path)[1]
             
             enable = 'true' if self.proxy_enable_var.get() else 'false'
             url = self.proxy_url_entry.get().strip()
             
             # 检查是否已存在 [telegram.proxy] 部分
-            import re
-            if re.search(r'\[telegram\.proxy\]', content):
-                # 更新现有配置
-                content = re.sub(
-                    r'(\[telegram\.proxy\][\s\S]*?enable\s*=\s*)(true|false)',
-                    f'\\1{enable}',
-                    content,
-                    flags=re.IGNORECASE
-                )
-                content = re.sub(
-                    r'(\[telegram\.proxy\][\s\S]*?url\s*=\s*)["\'][^"\']*["\']',
-                    f'\\1"{url}"',
-                    content
-                )
+            block_match = _RE_PROXY_BLOCK.search(content)
+            if block_match:
+                # 只在 [telegram.proxy] 块内更新现有配置
+                block = block_match.group(0)
+                block = replace_config_values(block, {'enable': enable, 'url': toml_string(url)})
+                content = "".join((content[:block_match.start()], block, content[block_match.end():]))
             else:
                 # 添加新配置
                 proxy_config = f'''\n[telegram.proxy]
 # 启用代理连接 telegram
 enable = {enable}
-url = "{url}"\n'''
-                # 在 [telegram] 部分后添加
-                if '[telegram]' in content:
-                    # 找到下一个 section 或文件末尾
-                    match = re.search(r'(\[telegram\][^\[]*)', content)
-                    if match:
-                        insert_pos = match.end()
-                        content = content[:insert_pos] + proxy_config + content[insert_pos:]
+url = {toml_string(url)}\n'''
+                # 在 [telegram] 部分后添加（匹配到下一个 section 或文件末尾）
+                match = _RE_TELEGRAM_BLOCK.search(content)
+                if match:
+                    insert_pos = match.end()
+                    content = "".join((content[:insert_pos], proxy_config, content[insert_pos:]))
                 else:
                     content += proxy_config
             
             # 备份并保存
-            backup_path = config_path + ".bak"
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(open(config_path, 'r', encoding='utf-8').read())
-            
-            with open(config_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_config_with_backup(config_path, content)
             
             self.settings_status.config(text="代理设置已保存到配置文件", foreground="green")
             self.log("已保存代理设置")
@@ -2067,24 +2903,9 @@ url = "{url}"\n'''
             return
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            import re
-            # 查找第一个 [[storages]] 部分
-            storage_match = re.search(
-                r'\[\[storages\]\][\s\S]*?name\s*=\s*["\']([^"\']+)["\'][\s\S]*?type\s*=\s*["\']([^"\']+)["\'][\s\S]*?enable\s*=\s*(true|false)[\s\S]*?base_path\s*=\s*["\']([^"\']+)["\']',
-                content,
-                re.IGNORECASE
-            )
-            
-            if storage_match:
-                self.storage_name_entry.delete(0, tk.END)
-                self.storage_name_entry.insert(0, storage_match.group(1))
-                self.storage_type_var.set(storage_match.group(2))
-                self.storage_enable_var.set(storage_match.group(3).lower() == 'true')
-                self.storage_path_entry.delete(0, tk.END)
-                self.storage_path_entry.insert(0, storage_match.group(4))
+            storage = read_config_parsed(config_path)[1]['storage']
+            if storage:
+                self._apply_storage_settings(storage)
                 self.settings_status.config(text="存储设置已从配置文件加载", foreground="green")
                 self.log("已加载存储设置")
             else:
@@ -2100,59 +2921,36 @@ url = "{url}"\n'''
             return
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = read_config_text(config_path)[1]
             
             name = self.storage_name_entry.get().strip()
             storage_type = self.storage_type_var.get()
             enable = 'true' if self.storage_enable_var.get() else 'false'
             base_path = self.storage_path_entry.get().strip()
             
-            import re
             # 检查是否已存在 [[storages]] 部分
-            if re.search(r'\[\[storages\]\]', content):
-                # 更新第一个 storages 配置
-                content = re.sub(
-                    r'(\[\[storages\]\][\s\S]*?name\s*=\s*)["\'][^"\']*["\']',
-                    f'\\1"{name}"',
-                    content,
-                    count=1
-                )
-                content = re.sub(
-                    r'(\[\[storages\]\][\s\S]*?type\s*=\s*)["\'][^"\']*["\']',
-                    f'\\1"{storage_type}"',
-                    content,
-                    count=1
-                )
-                content = re.sub(
-                    r'(\[\[storages\]\][\s\S]*?enable\s*=\s*)(true|false)',
-                    f'\\1{enable}',
-                    content,
-                    count=1,
-                    flags=re.IGNORECASE
-                )
-                content = re.sub(
-                    r'(\[\[storages\]\][\s\S]*?base_path\s*=\s*)["\'][^"\']*["\']',
-                    f'\\1"{base_path}"',
-                    content,
-                    count=1
-                )
+            storage_match = _RE_STORAGE_BLOCK.search(content)
+            if storage_match:
+                # 只在第一个 storages 块内更新配置
+                block = storage_match.group(0)
+                block = replace_config_values(block, {
+                    'name': toml_string(name),
+                    'type': toml_string(storage_type),
+                    'enable': enable,
+                    'base_path': toml_string(base_path),
+                })
+                content = "".join((content[:storage_match.start()], block, content[storage_match.end():]))
             else:
                 # 添加新配置
                 storage_config = f'''\n[[storages]]
-name = "{name}"
-type = "{storage_type}"
+name = {toml_string(name)}
+type = {toml_string(storage_type)}
 enable = {enable}
-base_path = "{base_path}"\n'''
+base_path = {toml_string(base_path)}\n'''
                 content += storage_config
             
             # 备份并保存
-            backup_path = config_path + ".bak"
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(open(config_path, 'r', encoding='utf-8').read())
-            
-            with open(config_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_config_with_backup(config_path, content)
             
             self.settings_status.config(text="存储设置已保存到配置文件", foreground="green")
             self.log("已保存存储设置")
@@ -2160,9 +2958,34 @@ base_path = "{base_path}"\n'''
         except Exception as e:
             messagebox.showerror("错误", f"保存失败: {str(e)}")
     
+    def set_entry_text(self, entry, text):
+        """输入框内容不同时才替换，避免重复加载时多余的 Tcl 调用"""
+        if entry.get() != text:
+            entry.delete(0, tk.END)
+            entry.insert(0, text)
+    
+    def _apply_proxy_settings(self, proxy):
+        """将解析出的代理设置填入界面"""
+        if proxy['enable'] is not None:
+            self.proxy_enable_var.set(proxy['enable'])
+        if proxy['url']:
+            self.set_entry_text(self.proxy_url_entry, proxy['url'])
+    
+    def _apply_storage_settings(self, storage):
+        """将解析出的存储设置填入界面，storage 为 None 时不做任何修改"""
+        if not storage:
+            return
+        if storage['name'] is not None:
+            self.set_entry_text(self.storage_name_entry, storage['name'])
+        if storage['type'] is not None:
+            self.storage_type_var.set(storage['type'])
+        if storage['enable'] is not None:
+            self.storage_enable_var.set(storage['enable'])
+        if storage['base_path'] is not None:
+            self.set_entry_text(self.storage_path_entry, storage['base_path'])
+    
     def get_settings_file_path(self):
         """获取设置文件路径"""
-        import os
         # 使用程序所在目录存储设置
         if getattr(sys, 'frozen', False):
             # 打包后的 exe
@@ -2223,10 +3046,10 @@ base_path = "{base_path}"\n'''
             return
         
         try:
-            # 静默加载代理设置
-            self.load_proxy_from_config_silent()
-            # 静默加载存储设置
-            self.load_storage_from_config_silent()
+            # 只读取一次配置文件，同时用于代理和存储设置
+            parsed = read_config_parsed(config_path)[1]
+            self._apply_proxy_settings(parsed['proxy'])
+            self._apply_storage_settings(parsed['storage'])
             self.log("已自动加载配置文件设置")
         except Exception as e:
             self.log(f"自动加载设置失败: {str(e)}")
@@ -2238,18 +3061,7 @@ base_path = "{base_path}"\n'''
             return
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            import re
-            enable_match = re.search(r'\[telegram\.proxy\][\s\S]*?enable\s*=\s*(true|false)', content, re.IGNORECASE)
-            if enable_match:
-                self.proxy_enable_var.set(enable_match.group(1).lower() == 'true')
-            
-            url_match = re.search(r'\[telegram\.proxy\][\s\S]*?url\s*=\s*["\']([^"\']+)["\']', content)
-            if url_match:
-                self.proxy_url_entry.delete(0, tk.END)
-                self.proxy_url_entry.insert(0, url_match.group(1))
+            self._apply_proxy_settings(read_config_parsed(config_path)[1]['proxy'])
         except Exception:
             pass
     
@@ -2260,31 +3072,7 @@ base_path = "{base_path}"\n'''
             return
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            import re
-            storage_match = re.search(r'\[\[storages\]\]([\s\S]*?)(?=\[\[|$)', content)
-            if storage_match:
-                storage_content = storage_match.group(1)
-                
-                name_match = re.search(r'name\s*=\s*["\']([^"\']+)["\']', storage_content)
-                if name_match:
-                    self.storage_name_entry.delete(0, tk.END)
-                    self.storage_name_entry.insert(0, name_match.group(1))
-                
-                type_match = re.search(r'type\s*=\s*["\']([^"\']+)["\']', storage_content)
-                if type_match:
-                    self.storage_type_var.set(type_match.group(1))
-                
-                enable_match = re.search(r'enable\s*=\s*(true|false)', storage_content, re.IGNORECASE)
-                if enable_match:
-                    self.storage_enable_var.set(enable_match.group(1).lower() == 'true')
-                
-                path_match = re.search(r'base_path\s*=\s*["\']([^"\']+)["\']', storage_content)
-                if path_match:
-                    self.storage_path_entry.delete(0, tk.END)
-                    self.storage_path_entry.insert(0, path_match.group(1))
+            self._apply_storage_settings(read_config_parsed(config_path)[1]['storage'])
         except Exception:
             pass
     
@@ -2297,11 +3085,7 @@ base_path = "{base_path}"\n'''
             except Exception:
                 pass
         
-        if self.log_file:
-            try:
-                self.log_file.close()
-            except Exception:
-                pass
+        self.close_log_file()
         
         self.root.destroy()
 
@@ -9,10 +9,11 @@ import sys
 import json
 import socket
 import webbrowser
-import queue
+import re
+import selectors
 from datetime import datetime, timedelta
 from collections import deque
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 
 # 全局变量用于 Web 服务
@@ -34,95 +35,181 @@ monitor_data = {
     "last_update": ""
 }
 
+# /api/status 的完整响应（响应头 + 正文），no-cache 让浏览器每次用 If-None-Match 重新验证
+_STATUS_RESPONSE_TMPL = (b'HTTP/1.1 200 OK\r\n'
+                         b'Content-Type: application/json; charset=utf-8\r\n'
+                         b'Cache-Control: no-cache\r\n'
+                         b'ETag: %s\r\n'
+                         b'Content-Length: %d\r\n\r\n')
+_NOT_MODIFIED_TMPL = b'HTTP/1.1 304 Not Modified\r\nETag: %s\r\n\r\n'
+_status_version = 0
+# ETag 带上每次启动随机生成的前缀，监控程序重启后版本号从头计数也不会与浏览器缓存的旧 ETag 相同
+_ETAG_EPOCH = os.urandom(4).hex().encode('ascii')
+
+
+def build_status_response():
+    """序列化 monitor_data，返回 (ETag, 完整响应字节)"""
+    body = json.dumps(monitor_data, ensure_ascii=False).encode('utf-8')
+    etag = b'"%s-%d"' % (_ETAG_EPOCH, _status_version)
+    return etag, _STATUS_RESPONSE_TMPL % (etag, len(body)) + body
+
+
+# 每次界面刷新后由 publish_status() 重新生成，请求时直接写出，与客户端数量无关
+_status_response = build_status_response()
+
+
+def publish_status():
+    """序列化 monitor_data 并缓存，整体替换引用，请求线程读到的总是完整快照"""
+    global _status_response, _status_version
+    _status_version += 1
+    _status_response = build_status_response()
+
+
+class RingLogBuffer:
+    """保存最近若干行日志的环形缓冲，按行维护拼接好的 JSON 转义字节
+
+    追加时只做一次转义和编码，超出行数时从头部删除最旧的一行；
+    读取时直接返回拼接结果，不必每次请求重新 join 全部日志。
+    """
+    
+    def __init__(self, max_lines):
+        self.max_lines = max_lines
+        self._buf = bytearray()
+        self._sizes = deque()
+        self._lock = threading.Lock()
+    
+    def append(self, line):
+        # 每行以转义后的 \n 结尾，读取时去掉最后一个
+        data = json.dumps(line, ensure_ascii=False)[1:-1].encode('utf-8') + b'\\n'
+        with self._lock:
+            self._buf.extend(data)
+            self._sizes.append(len(data))
+            if len(self._sizes) > self.max_lines:
+                del self._buf[:self._sizes.popleft()]
+    
+    def clear(self):
+        with self._lock:
+            self._buf.clear()
+            self._sizes.clear()
+    
+    def getvalue(self):
+        """返回所有日志行以转义 \n 连接后的字节（切片副本）"""
+        with self._lock:
+            return self._buf[:-2]
+
+
 # 全局变量
 config_path = None
 control_callback = None
-recent_logs = deque(maxlen=500)  # 保存最近500行日志用于Web显示
+recent_logs = RingLogBuffer(500)  # 保存最近500行日志用于Web显示
+
+# 控制台日志框最多显示的行数，超出后裁剪到 CONSOLE_KEEP_LINES 行；待显示队列同样以此为上限
+CONSOLE_MAX_LINES = 2000
+CONSOLE_KEEP_LINES = 1500
+
+# 配置编辑器的撤销步数上限；只追加的日志框不开启撤销
+CONFIG_EDITOR_MAX_UNDO = 100
+
+# 日志文件两次 flush 之间的最短间隔（秒）；期间写入的日志留在文件缓冲区，由界面线程定时补刷
+LOG_FLUSH_INTERVAL = 0.5
 
+# 读取 SaveAny-Bot 输出时每次读取的最大字节数，读取缓冲区只分配一次
+OUTPUT_READ_SIZE = 64 * 1024
 
-class StoppableHTTPServer(HTTPServer):
+# 启动 SaveAny-Bot 时隐藏控制台窗口的 STARTUPINFO，只在导入时构建一次；非 Windows 平台为 None
+if sys.platform == 'win32':
+    BOT_STARTUPINFO = subprocess.STARTUPINFO()
+    BOT_STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    BOT_STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+else:
+    BOT_STARTUPINFO = None
+
+# 配置文件解析用的预编译正则
+# name = "本地磁盘" 且 type = "local" 的 [[storages]] 中的 base_path
+_RE_LOCAL_STORAGE_PATH = re.compile(
+    r'\[\[storages\]\](.*?)name\s*=\s*["\']本地磁盘["\'](.*?)type\s*=\s*["\']local["\'](.*?)base_path\s*=\s*["\'](.*?)["\']', re.DOTALL)
+_RE_LOCAL_STORAGE_PATH_SUB = re.compile(
+    r'(\[\[storages\]\](.*?)name\s*=\s*["\']本地磁盘["\'](.*?)type\s*=\s*["\']local["\'](.*?)base_path\s*=\s*)["\'].*?["\']', re.DOTALL)
+# [temp] 中的 base_path
+_RE_TEMP_PATH = re.compile(r'\[temp\](.*?)base_path\s*=\s*["\'](.*?)["\']', re.DOTALL)
+_RE_TEMP_PATH_SUB = re.compile(r'(\[temp\](.*?)base_path\s*=\s*)["\'].*?["\']', re.DOTALL)
+_RE_PROXY_ENABLE = re.compile(r'\[telegram\.proxy\].*?enable\s*=\s*(true|false)', re.S)
+_RE_PROXY_URL = re.compile(r'\[telegram\.proxy\].*?url\s*=\s*"(.*?)"', re.S)
+_RE_STORAGE_LOCAL_PATH = re.compile(r'\[storage\].*?local_path\s*=\s*"(.*?)"', re.S)
+
+
+class StoppableHTTPServer(ThreadingHTTPServer):
     """可停止的 HTTP 服务器，针对 Windows Server 优化"""
     
     allow_reuse_address = True
+    daemon_threads = True
+    block_on_close = False
+    # listen 队列长度，默认 5 在多个标签页同时连接时容易被拒绝
+    request_queue_size = 128
+    # 同时处理的连接数上限，长连接会占用线程直到空闲超时
+    max_workers = 16
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._stop_event = threading.Event()
-        self.socket.settimeout(1.0)
+        self._workers = threading.BoundedSemaphore(self.max_workers)
+        # stop() 向 _wake_w 写入一个字节即可唤醒阻塞中的 select，无需定时轮询
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.socket, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+    
+    def process_request(self, request, client_address):
+        """每个连接在独立线程中处理，超过上限时等待空闲线程"""
+        self._workers.acquire()
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._workers.release()
+            raise
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._workers.release()
     
     def serve_forever_stoppable(self):
         """可停止的服务循环"""
-        while not self._stop_event.is_set():
-            try:
-                self.handle_request()
-            except socket.timeout:
-                continue
-            except OSError:
-                break
-            except Exception:
-                continue
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    events = self._selector.select()
+                except OSError:
+                    break
+                if any(key.fileobj is self._wake_r for key, _ in events):
+                    break
+                try:
+                    self._handle_request_noblock()
+                except OSError:
+                    break
+                except Exception:
+                    continue
+        finally:
+            self._selector.close()
+            self._wake_r.close()
+            self._wake_w.close()
     
     def stop(self):
         """停止服务器"""
         self._stop_event.set()
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
         try:
             self.socket.close()
         except Exception:
             pass
 
 
-class MonitorHTTPHandler(BaseHTTPRequestHandler):
-    """HTTP 请求处理器"""
-    
-    protocol_version = 'HTTP/1.0'
-    timeout = 10
-    
-    def log_message(self, format, *args):
-        pass
-    
-    def handle_one_request(self):
-        try:
-            super().handle_one_request()
-        except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
-            pass
-        except socket.timeout:
-            pass
-        except Exception:
-            pass
-    
-    def do_GET(self):
-        try:
-            parsed_path = urlparse(self.path)
-            
-            if parsed_path.path == '/' or parsed_path.path == '/index.html':
-                self.send_html_page()
-            elif parsed_path.path == '/api/status':
-                self.send_json_status()
-            elif parsed_path.path == '/api/config':
-                self.send_config()
-            elif parsed_path.path == '/api/logs':
-                self.send_logs()
-            else:
-                self.send_error(404, "Not Found")
-        except Exception:
-            pass
-    
-    def do_POST(self):
-        try:
-            parsed_path = urlparse(self.path)
-            
-            if parsed_path.path == '/api/config':
-                self.save_config()
-            elif parsed_path.path == '/api/control':
-                self.handle_control()
-            else:
-                self.send_error(404, "Not Found")
-        except Exception:
-            pass
-    
-    def send_html_page(self):
-        """发送 HTML 页面"""
-        html = '''<!DOCTYPE html>
+# Web 监控页面，内容固定，导入时编码一次，每次请求直接写出
+_INDEX_HTML_BYTES = '''<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
@@ -360,45 +447,98 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
         setInterval(updateStatus, 1000);
     </script>
 </body>
-</html>'''
+</html>'''.encode('utf-8')
+_INDEX_HTML_LEN = str(len(_INDEX_HTML_BYTES))
+
+
+class MonitorHTTPHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理器"""
+    
+    # HTTP/1.1 长连接：页面每秒轮询时复用同一个 TCP 连接；空闲 10 秒后断开
+    protocol_version = 'HTTP/1.1'
+    timeout = 10
+    # 响应头和响应体分两次写出，关闭 Nagle 避免长连接上等待延迟确认
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def handle_one_request(self):
+        try:
+            super().handle_one_request()
+        except Exception:
+            # 连接已断开、超时或处理出错时结束这个长连接
+            self.close_connection = True
+    
+    def do_GET(self):
+        try:
+            parsed_path = urlparse(self.path)
+            
+            if parsed_path.path == '/' or parsed_path.path == '/index.html':
+                self.send_html_page()
+            elif parsed_path.path == '/api/status':
+                self.send_json_status()
+            elif parsed_path.path == '/api/config':
+                self.send_config()
+            elif parsed_path.path == '/api/logs':
+                self.send_logs()
+            else:
+                self.send_error(404, "Not Found")
+        except Exception:
+            self.close_connection = True
+    
+    def do_POST(self):
+        try:
+            parsed_path = urlparse(self.path)
+            
+            if parsed_path.path == '/api/config':
+                self.save_config()
+            elif parsed_path.path == '/api/control':
+                self.handle_control()
+            else:
+                self.send_error(404, "Not Found")
+        except Exception:
+            self.close_connection = True
+    
+    def send_html_page(self):
+        """发送 HTML 页面"""
         try:
-            content = html.encode('utf-8')
             self.send_response(200)
             self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
+            self.send_header('Content-Length', _INDEX_HTML_LEN)
             self.end_headers()
-            self.wfile.write(content)
+            self.wfile.write(_INDEX_HTML_BYTES)
         except Exception:
-            pass
+            self.close_connection = True
     
     def send_json_status(self):
+        """直接写出预先生成的状态响应；客户端已有当前版本时回复 304"""
         try:
-            content = json.dumps(monitor_data, ensure_ascii=False).encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
-            self.end_headers()
-            self.wfile.write(content)
+            etag, response = _status_response
+            if self.headers.get('If-None-Match') == etag.decode('ascii'):
+                self.wfile.write(_NOT_MODIFIED_TMPL % etag)
+            else:
+                self.wfile.write(response)
         except Exception:
-            pass
+            self.close_connection = True
     
     def send_logs(self):
         """发送日志内容"""
-        global recent_logs
         try:
-            logs_text = '\n'.join(recent_logs) if recent_logs else '暂无日志，请通过监控程序启动 SaveAny-Bot 以捕获日志'
-            result = {"logs": logs_text}
-            content = json.dumps(result, ensure_ascii=False).encode('utf-8')
+            logs = recent_logs.getvalue()
+            if logs:
+                # 缓冲内已是拼接好的转义字节，直接包装成 JSON
+                content = b''.join((b'{"logs": "', logs, b'"}'))
+            else:
+                result = {"logs": '暂无日志，请通过监控程序启动 SaveAny-Bot 以捕获日志'}
+                content = json.dumps(result, ensure_ascii=False).encode('utf-8')
             self.send_response(200)
             self.send_header('Content-Type', 'application/json; charset=utf-8')
             self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
             self.end_headers()
             self.wfile.write(content)
         except Exception:
-            pass
+            self.close_connection = True
     
     def send_config(self):
         global config_path
@@ -417,11 +557,10 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
             self.send_response(200)
             self.send_header('Content-Type', 'application/json; charset=utf-8')
             self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
             self.end_headers()
             self.wfile.write(content)
         except Exception:
-            pass
+            self.close_connection = True
     
     def save_config(self):
         global config_path
@@ -444,11 +583,10 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
             self.send_response(200)
             self.send_header('Content-Type', 'application/json; charset=utf-8')
             self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
             self.end_headers()
             self.wfile.write(content)
         except Exception:
-            pass
+            self.close_connection = True
     
     def handle_control(self):
         global control_callback
@@ -471,11 +609,10 @@ class MonitorHTTPHandler(BaseHTTPRequestHandler):
             self.send_response(200)
             self.send_header('Content-Type', 'application/json; charset=utf-8')
             self.send_header('Content-Length', str(len(content)))
-            self.send_header('Connection', 'close')
             self.end_headers()
             self.wfile.write(content)
         except Exception:
-            pass
+            self.close_connection = True
 
 
 class SaveAnyMonitor:
@@ -495,6 +632,12 @@ class SaveAnyMonitor:
         self.update_interval = 1000
         
         self.net_history = deque(maxlen=60)
+        # 监控标签当前显示的文本和进度条的值，用于跳过未变化的更新
+        self._label_values = {}
+        # 物理内存总量运行期间不变，只查询一次
+        self._total_mem = psutil.virtual_memory().total
+        # 最近一次找到的目标进程 (小写进程名, Process)，进程仍在运行时直接复用
+        self._proc_cache = (None, None)
         self.last_net_io = None
         self.last_net_time = None
         self.proc_last_io = None
@@ -505,15 +648,20 @@ class SaveAnyMonitor:
         self.web_port = 8080
         
         # 日志相关
-        self.log_queue = queue.Queue()
+        # 读取线程 append，UI 线程 popleft；超过日志框容量的积压日志直接丢弃最旧的行
+        self.log_queue = deque(maxlen=CONSOLE_MAX_LINES)
         self.log_file = None
         self.log_file_path = None
+        # 读取线程写入日志文件、界面线程定时 flush，两者通过锁互斥
+        self._log_file_lock = threading.Lock()
+        self._log_file_dirty = False
+        self._log_flush_time = 0.0
         self.capture_logs = True
         
-        global config_path, control_callback, recent_logs
+        global config_path, control_callback
         config_path = None
         control_callback = self.handle_web_control
-        recent_logs = deque(maxlen=500)
+        recent_logs.clear()
         
         self.create_widgets()
         self.auto_detect_exe_path()
@@ -664,7 +812,8 @@ class SaveAnyMonitor:
         log_frame = ttk.LabelFrame(parent, text="最近日志", padding="5")
         log_frame.pack(fill=tk.BOTH, expand=True)
         
-        self.log_text = tk.Text(log_frame, height=4, wrap=tk.WORD, font=("Consolas", 9))
+        self.log_text = tk.Text(log_frame, height=4, wrap=tk.WORD, font=("Consolas", 9),
+                                undo=False, autoseparators=False)
         self.log_text.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
         scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -699,8 +848,11 @@ class SaveAnyMonitor:
         self.log_path_label.pack(side=tk.LEFT, padx=(5, 0))
         
         # 日志文本框
-        self.console_log = scrolledtext.ScrolledText(parent, wrap=tk.WORD, font=("Consolas", 9), background="#000", foreground="#0f0")
+        self.console_log = scrolledtext.ScrolledText(parent, wrap=tk.WORD, font=("Consolas", 9), background="#000", foreground="#0f0",
+                                                     undo=False, autoseparators=False)
         self.console_log.pack(fill=tk.BOTH, expand=True)
+        # 日志框当前行数由插入和删除时自行计数，不必每次向 Tk 查询 index
+        self._console_line_count = 0
 
     def create_config_tab(self, parent):
         info_label = ttk.Label(parent, text="编辑 SaveAny-Bot 的配置文件 (config.toml)，修改后点击保存按钮。", wraplength=650)
@@ -725,7 +877,8 @@ class SaveAnyMonitor:
         editor_frame = ttk.Frame(parent)
         editor_frame.pack(fill=tk.BOTH, expand=True)
         
-        self.config_editor = scrolledtext.ScrolledText(editor_frame, wrap=tk.NONE, font=("Consolas", 10), undo=True)
+        self.config_editor = scrolledtext.ScrolledText(editor_frame, wrap=tk.NONE, font=("Consolas", 10),
+                                                       undo=True, maxundo=CONFIG_EDITOR_MAX_UNDO)
         self.config_editor.pack(fill=tk.BOTH, expand=True)
         
         h_scrollbar = ttk.Scrollbar(editor_frame, orient=tk.HORIZONTAL, command=self.config_editor.xview)
@@ -842,44 +995,80 @@ class SaveAnyMonitor:
     
     def add_console_log(self, message):
         """添加控制台日志"""
-        global recent_logs
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_line = f"[{timestamp}] {message}"
         
-        # 添加到全局日志队列（用于Web显示）
-        recent_logs.append(log_line)        
+        # 添加到全局日志缓冲（用于Web显示）
+        recent_logs.append(log_line)
         # 写入日志文件
+        # 距上次 flush 不足 LOG_FLUSH_INTERVAL 时先留在缓冲区
         if self.log_file:
-            try:
-                self.log_file.write(log_line + '\n')
-                self.log_file.flush()
-            except Exception:
-                pass
+            with self._log_file_lock:
+                try:
+                    self.log_file.write(log_line + '\n')
+                    now = time.monotonic()
+                    if now - self._log_flush_time >= LOG_FLUSH_INTERVAL:
+                        self.log_file.flush()
+                        self._log_flush_time = now
+                        self._log_file_dirty = False
+                    else:
+                        self._log_file_dirty = True
+                except Exception:
+                    pass
         
         # 添加到队列等待UI更新
-        self.log_queue.put(log_line)
+        self.log_queue.append(log_line)
     
     def process_log_queue(self):
         """处理日志队列，更新UI"""
-        try:
-            while True:
-                log_line = self.log_queue.get_nowait()
-                self.console_log.insert(tk.END, log_line + '\n')
-                if self.auto_scroll_var.get():
-                    self.console_log.see(tk.END)
-                # 限制显示行数
-                lines = int(self.console_log.index('end-1c').split('.')[0])
-                if lines > 2000:
-                    self.console_log.delete('1.0', '500.0')
-        except queue.Empty:
-            pass
+        # 取出开始时已在队列中的日志，整批一次插入，只滚动和检查行数一次；
+        # 读取线程持续写入时也不会一直取下去
+        popleft = self.log_queue.popleft
+        batch = [popleft() for _ in range(len(self.log_queue))]
+        
+        if batch:
+            self.console_log.insert(tk.END, '\n'.join(batch) + '\n')
+            # 限制显示行数，超过上限时才删除
+            lines = self._console_line_count + len(batch)
+            if lines > CONSOLE_MAX_LINES:
+                self.console_log.delete('1.0', f'{lines - CONSOLE_KEEP_LINES + 1}.0')
+                lines = CONSOLE_KEEP_LINES
+            self._console_line_count = lines
+            if self.auto_scroll_var.get():
+                self.console_log.see(tk.END)
+        
+        if self._log_file_dirty:
+            self.flush_log_file()
         
         if self.running:
             self.root.after(100, self.process_log_queue)
+    
+    def flush_log_file(self):
+        """把缓冲区中尚未刷新的日志写入日志文件"""
+        with self._log_file_lock:
+            if self.log_file and self._log_file_dirty:
+                try:
+                    self.log_file.flush()
+                except Exception:
+                    pass
+                self._log_file_dirty = False
+                self._log_flush_time = time.monotonic()
+    
+    def close_log_file(self):
+        """关闭日志文件，缓冲区中的日志随 close 一并写入"""
+        with self._log_file_lock:
+            if self.log_file:
+                try:
+                    self.log_file.close()
+                except Exception:
+                    pass
+                self.log_file = None
+                self._log_file_dirty = False
 
     def clear_console_log(self):
         """清空控制台日志显示"""
         self.console_log.delete('1.0', tk.END)
+        self._console_line_count = 0
     
     def open_log_folder(self):
         """打开日志文件夹"""
@@ -897,7 +1086,6 @@ class SaveAnyMonitor:
     
     def auto_detect_exe_path(self):
         """自动检测saveany-bot.exe的路径"""
-        import os
         search_paths = []
         
         # 当前目录及其子目录
@@ -941,12 +1129,24 @@ class SaveAnyMonitor:
             self.log("未检测到SaveAny-Bot路径，请手动选择")
     
     def find_process(self):
-        for proc in psutil.process_iter(['pid', 'name', 'exe']):
+        """查找目标进程；找到后缓存 Process 对象，进程仍在运行时不再遍历全部进程"""
+        target = self.target_process.lower()
+        cached_name, cached_proc = self._proc_cache
+        if cached_proc is not None and cached_name == target:
+            # is_running() 同时比较创建时间，PID 被复用时会返回 False
+            if cached_proc.is_running():
+                return cached_proc
+        
+        # 遍历时只取进程名，不为每个进程查询 exe
+        for proc in psutil.process_iter(['pid', 'name']):
             try:
-                if proc.info['name'] and proc.info['name'].lower() == self.target_process.lower():
+                name = proc.info['name']
+                if name and name.lower() == target:
+                    self._proc_cache = (target, proc)
                     return proc
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 continue
+        self._proc_cache = (target, None)
         return None
     
     def format_bytes(self, bytes_value):
@@ -977,6 +1177,19 @@ class SaveAnyMonitor:
         else:
             return f"{int(seconds // 86400)}天{int((seconds % 86400) // 3600)}时"
     
+    def set_label_text(self, label, text, **options):
+        """仅在文本变化时更新标签，减少每秒刷新时的 Tcl 调用；options 随文本一起设置"""
+        if self._label_values.get(label) != text:
+            label.config(text=text, **options)
+            self._label_values[label] = text
+    
+    def set_progress_value(self, bar, value):
+        """进度条变化小于 0.5 时跳过更新（归零除外）"""
+        last = self._label_values.get(bar)
+        if last is None or abs(value - last) >= 0.5 or (value == 0 and last != 0):
+            bar['value'] = value
+            self._label_values[bar] = value
+    
     def update_ui(self):
         global monitor_data
         
@@ -984,80 +1197,82 @@ class SaveAnyMonitor:
             return
         
         try:
+            # 进程 IO 和系统网络速率共用同一个时间点；用单调时钟，不受系统校时影响
+            sample_time = time.monotonic()
             proc = self.find_process()
             
             if proc:
                 try:
-                    self.status_label.config(text="运行中", foreground="green")
-                    self.pid_label.config(text=str(proc.pid))
+                    self.set_label_text(self.status_label, "运行中", foreground="green")
+                    self.set_label_text(self.pid_label, str(proc.pid))
                     monitor_data["status"] = "运行中"
                     monitor_data["pid"] = str(proc.pid)
                     
                     with proc.oneshot():
                         cpu_percent = proc.cpu_percent()
-                        self.cpu_progress['value'] = min(cpu_percent, 100)
-                        self.cpu_label.config(text=f"{cpu_percent:.1f}%")
+                        self.set_progress_value(self.cpu_progress, min(cpu_percent, 100))
+                        self.set_label_text(self.cpu_label, f"{cpu_percent:.1f}%")
                         monitor_data["cpu"] = round(cpu_percent, 1)
                         
                         mem_info = proc.memory_info()
                         mem_mb = mem_info.rss / (1024 * 1024)
-                        total_mem = psutil.virtual_memory().total
-                        mem_percent = (mem_info.rss / total_mem) * 100
-                        self.mem_progress['value'] = min(mem_percent, 100)
-                        self.mem_label.config(text=f"{mem_mb:.1f} MB")
+                        mem_percent = (mem_info.rss / self._total_mem) * 100
+                        self.set_progress_value(self.mem_progress, min(mem_percent, 100))
+                        self.set_label_text(self.mem_label, f"{mem_mb:.1f} MB")
                         monitor_data["memory"] = f"{mem_mb:.1f} MB"
                         monitor_data["memory_percent"] = round(mem_percent, 1)
                         
                         num_threads = proc.num_threads()
-                        self.thread_label.config(text=str(num_threads))
+                        self.set_label_text(self.thread_label, str(num_threads))
                         monitor_data["threads"] = str(num_threads)
                         
                         try:
                             num_handles = proc.num_handles()
-                            self.handle_label.config(text=str(num_handles))
+                            self.set_label_text(self.handle_label, str(num_handles))
                             monitor_data["handles"] = str(num_handles)
                         except AttributeError:
-                            self.handle_label.config(text="N/A")
+                            self.set_label_text(self.handle_label, "N/A")
                             monitor_data["handles"] = "N/A"
                         
                         create_time = proc.create_time()
                         uptime = time.time() - create_time
                         uptime_str = self.format_uptime(uptime)
-                        self.uptime_label.config(text=uptime_str)
+                        self.set_label_text(self.uptime_label, uptime_str)
                         monitor_data["uptime"] = uptime_str
                         
-                        exe_path = proc.exe()
-                        if exe_path and not self.target_path:
-                            self.target_path = exe_path
-                            self.path_label.config(text=exe_path)
-                            self.update_config_path()
+                        # exe() 不在 oneshot 的缓存范围内，只在还不知道程序路径时查询
+                        if not self.target_path:
+                            exe_path = proc.exe()
+                            if exe_path:
+                                self.target_path = exe_path
+                                self.path_label.config(text=exe_path)
+                                self.update_config_path()
                         
                         try:
                             io_counters = proc.io_counters()
-                            current_time = time.time()
                             
                             if self.proc_last_io and self.proc_last_time:
-                                time_diff = current_time - self.proc_last_time
+                                time_diff = sample_time - self.proc_last_time
                                 if time_diff > 0:
                                     read_speed = (io_counters.read_bytes - self.proc_last_io.read_bytes) / time_diff
                                     write_speed = (io_counters.write_bytes - self.proc_last_io.write_bytes) / time_diff
                                     
                                     ul_speed = self.format_speed(max(0, read_speed))
                                     dl_speed = self.format_speed(max(0, write_speed))
-                                    self.download_label.config(text=dl_speed)
-                                    self.upload_label.config(text=ul_speed)
+                                    self.set_label_text(self.download_label, dl_speed)
+                                    self.set_label_text(self.upload_label, ul_speed)
                                     monitor_data["download_speed"] = dl_speed
                                     monitor_data["upload_speed"] = ul_speed
                             
                             total_ul = self.format_bytes(io_counters.read_bytes)
                             total_dl = self.format_bytes(io_counters.write_bytes)
-                            self.total_download_label.config(text=total_dl)
-                            self.total_upload_label.config(text=total_ul)
+                            self.set_label_text(self.total_download_label, total_dl)
+                            self.set_label_text(self.total_upload_label, total_ul)
                             monitor_data["total_download"] = total_dl
                             monitor_data["total_upload"] = total_ul
                             
                             self.proc_last_io = io_counters
-                            self.proc_last_time = current_time
+                            self.proc_last_time = sample_time
                         except (psutil.AccessDenied, AttributeError):
                             pass
                     
@@ -1068,27 +1283,27 @@ class SaveAnyMonitor:
             
             try:
                 net_io = psutil.net_io_counters()
-                current_time = time.time()
                 
                 if self.last_net_io and self.last_net_time:
-                    time_diff = current_time - self.last_net_time
+                    time_diff = sample_time - self.last_net_time
                     if time_diff > 0:
                         download_speed = (net_io.bytes_recv - self.last_net_io.bytes_recv) / time_diff
                         upload_speed = (net_io.bytes_sent - self.last_net_io.bytes_sent) / time_diff
                         
                         sys_dl = self.format_speed(max(0, download_speed))
                         sys_ul = self.format_speed(max(0, upload_speed))
-                        self.sys_download_label.config(text=sys_dl)
-                        self.sys_upload_label.config(text=sys_ul)
+                        self.set_label_text(self.sys_download_label, sys_dl)
+                        self.set_label_text(self.sys_upload_label, sys_ul)
                         monitor_data["sys_download"] = sys_dl
                         monitor_data["sys_upload"] = sys_ul
                 
                 self.last_net_io = net_io
-                self.last_net_time = current_time
+                self.last_net_time = sample_time
             except Exception:
                 pass
             
             monitor_data["last_update"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            publish_status()
                 
         except Exception as e:
             self.log(f"更新错误: {str(e)}")
@@ -1099,19 +1314,19 @@ class SaveAnyMonitor:
     def set_offline_status(self):
         global monitor_data
         
-        self.status_label.config(text="未运行", foreground="red")
-        self.pid_label.config(text="-")
-        self.uptime_label.config(text="-")
-        self.cpu_progress['value'] = 0
-        self.cpu_label.config(text="0%")
-        self.mem_progress['value'] = 0
-        self.mem_label.config(text="0 MB")
-        self.thread_label.config(text="-")
-        self.handle_label.config(text="-")
-        self.download_label.config(text="0 KB/s")
-        self.upload_label.config(text="0 KB/s")
-        self.total_download_label.config(text="0 MB")
-        self.total_upload_label.config(text="0 MB")
+        self.set_label_text(self.status_label, "未运行", foreground="red")
+        self.set_label_text(self.pid_label, "-")
+        self.set_label_text(self.uptime_label, "-")
+        self.set_progress_value(self.cpu_progress, 0)
+        self.set_label_text(self.cpu_label, "0%")
+        self.set_progress_value(self.mem_progress, 0)
+        self.set_label_text(self.mem_label, "0 MB")
+        self.set_label_text(self.thread_label, "-")
+        self.set_label_text(self.handle_label, "-")
+        self.set_label_text(self.download_label, "0 KB/s")
+        self.set_label_text(self.upload_label, "0 KB/s")
+        self.set_label_text(self.total_download_label, "0 MB")
+        self.set_label_text(self.total_upload_label, "0 MB")
         self.proc_last_io = None
         self.proc_last_time = None
         
@@ -1175,33 +1390,16 @@ class SaveAnyMonitor:
             self.log_file = open(self.log_file_path, 'w', encoding='utf-8')
             self.log_path_label.config(text=self.log_file_path, foreground="green")
             
-            # 启动进程，捕获输出
-            if sys.platform == 'win32':
-                # Windows: 使用 STARTUPINFO 隐藏窗口
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-                
-                self.managed_process = subprocess.Popen(
-                    [self.target_path],
-                    cwd=work_dir,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    startupinfo=startupinfo,
-                    bufsize=1,
-                    universal_newlines=True,
-                    encoding='utf-8',
-                    errors='replace'
-                )
-            else:
-                self.managed_process = subprocess.Popen(
-                    [self.target_path],
-                    cwd=work_dir,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    bufsize=1,
-                    universal_newlines=True
-                )
+            # 启动进程，捕获输出；Windows 上通过 STARTUPINFO 隐藏窗口
+            # 输出以无缓冲的字节管道读取，由 read_process_output 按块读取后自行切分和解码
+            self.managed_process = subprocess.Popen(
+                [self.target_path],
+                cwd=work_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                startupinfo=BOT_STARTUPINFO,
+                bufsize=0
+            )
             
             self.log(f"正在启动进程: {self.target_path}")
             self.log(f"日志文件: {self.log_file_path}")
@@ -1224,13 +1422,33 @@ class SaveAnyMonitor:
             return
         
         try:
-            for line in iter(self.managed_process.stdout.readline, ''):
-                if not self.running:
+            # 每次最多读取 OUTPUT_READ_SIZE 字节到预先分配的缓冲区，而不是每行一次 readline；
+            # 未完整的行留在 pending 中，下次读取后再切分
+            stdout = self.managed_process.stdout
+            read_buf = bytearray(OUTPUT_READ_SIZE)
+            read_view = memoryview(read_buf)
+            pending = bytearray()
+            while self.running:
+                n = stdout.readinto(read_buf)
+                if not n:
                     break
-                line = line.rstrip('\n\r')
-                if line:
+                pending += read_view[:n]
+                end = pending.rfind(b'\n')
+                if end < 0:
+                    continue
+                # 完整的部分整体解码一次再按行切分
+                text = pending[:end].decode('utf-8', 'replace')
+                del pending[:end + 1]
+                lines = text.split('\n')
+                if '\r' in text:
+                    lines = [line.rstrip('\r') for line in lines]
+                for line in filter(None, lines):
                     self.add_console_log(line)
             
+            tail = pending.decode('utf-8', 'replace').rstrip('\r')
+            if tail:
+                self.add_console_log(tail)
+            
             # 进程结束
             self.managed_process.stdout.close()
             return_code = self.managed_process.wait()
@@ -1240,12 +1458,7 @@ class SaveAnyMonitor:
             self.add_console_log(f"读取输出错误: {str(e)}")
         finally:
             self.managed_process = None
-            if self.log_file:
-                try:
-                    self.log_file.close()
-                except Exception:
-                    pass
-                self.log_file = None
+            self.close_log_file()
     
     def stop_process(self):
         proc = self.find_process()
@@ -1327,10 +1540,8 @@ class SaveAnyMonitor:
                 self.config_status.config(text=f"配置已加载: {datetime.now().strftime('%H:%M:%S')}", foreground="green")
                 
                 # 解析配置文件，提取base_path（只匹配name = "本地磁盘"和type = "local"的存储配置）
-                import re
                 # 查找name = "本地磁盘"且type = "local"的[[storages]]部分中的base_path
-                pattern = r'\[\[storages\]\](.*?)name\s*=\s*["\']本地磁盘["\'](.*?)type\s*=\s*["\']local["\'](.*?)base_path\s*=\s*["\'](.*?)["\']'
-                base_path_match = re.search(pattern, content, re.DOTALL)
+                base_path_match = _RE_LOCAL_STORAGE_PATH.search(content)
                 if base_path_match:
                     base_path = base_path_match.group(4)
                     if hasattr(self, 'local_path_entry'):
@@ -1338,8 +1549,7 @@ class SaveAnyMonitor:
                         self.local_path_entry.insert(0, base_path)
                 
                 # 解析配置文件，提取[temp]部分的base_path
-                temp_pattern = r'\[temp\](.*?)base_path\s*=\s*["\'](.*?)["\']'
-                temp_match = re.search(temp_pattern, content, re.DOTALL)
+                temp_match = _RE_TEMP_PATH.search(content)
                 if temp_match:
                     temp_path = temp_match.group(2)
                     if hasattr(self, 'temp_path_entry'):
@@ -1361,15 +1571,9 @@ class SaveAnyMonitor:
             if hasattr(self, 'local_path_entry'):
                 local_path = self.local_path_entry.get().strip()
                 if local_path:
-                    import re
                     # 更新name = "本地磁盘"且type = "local"的[[storages]]部分中的base_path
-                    pattern = r'(\[\[storages\]\](.*?)name\s*=\s*["\']本地磁盘["\'](.*?)type\s*=\s*["\']local["\'](.*?)base_path\s*=\s*)["\'].*?["\']'
-                    updated_content = re.sub(
-                        pattern,
-                        r'\1"' + local_path + '"',
-                        content,
-                        flags=re.DOTALL
-                    )
+                    updated_content = _RE_LOCAL_STORAGE_PATH_SUB.sub(
+                        lambda m: f'{m.group(1)}"{local_path}"', content)
                     if updated_content != content:
                         content = updated_content
                         # 更新编辑器内容
@@ -1380,15 +1584,9 @@ class SaveAnyMonitor:
             if hasattr(self, 'temp_path_entry'):
                 temp_path = self.temp_path_entry.get().strip()
                 if temp_path:
-                    import re
                     # 更新[temp]部分中的base_path
-                    temp_pattern = r'(\[temp\](.*?)base_path\s*=\s*)["\'].*?["\']'
-                    updated_content = re.sub(
-                        temp_pattern,
-                        r'\1"' + temp_path + '"',
-                        content,
-                        flags=re.DOTALL
-                    )
+                    updated_content = _RE_TEMP_PATH_SUB.sub(
+                        lambda m: f'{m.group(1)}"{temp_path}"', content)
                     if updated_content != content:
                         content = updated_content
                         # 更新编辑器内容
@@ -1468,12 +1666,11 @@ class SaveAnyMonitor:
     
     def get_local_ip(self):
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except Exception:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                # UDP connect 不发包也不会阻塞，只查询路由表得到本机出口地址，不经过 DNS
+                s.connect(("8.8.8.8", 80))
+                return s.getsockname()[0]
+        except OSError:
             return "127.0.0.1"
     
     def handle_web_control(self, action):
@@ -1513,7 +1710,6 @@ class SaveAnyMonitor:
         
         def do_test():
             try:
-                import re
                 # 简单解析
                 pattern = r'socks5://(?:([^:]+):([^@]+)@)?([^:]+):(\d+)'
                 match = re.match(pattern, proxy_url)
@@ -1545,17 +1741,17 @@ class SaveAnyMonitor:
         content = self.config_editor.get('1.0', tk.END)
         
         # 提取代理
-        proxy_match = re.search(r'\[telegram\.proxy\].*?enable\s*=\s*(true|false)', content, re.S)
+        proxy_match = _RE_PROXY_ENABLE.search(content)
         if proxy_match:
             self.proxy_enable_var.set(proxy_match.group(1) == 'true')
         
-        url_match = re.search(r'\[telegram\.proxy\].*?url\s*=\s*"(.*?)"', content, re.S)
+        url_match = _RE_PROXY_URL.search(content)
         if url_match:
             self.proxy_url_entry.delete(0, tk.END)
             self.proxy_url_entry.insert(0, url_match.group(1))
             
         # 提取路径
-        local_match = re.search(r'\[storage\].*?local_path\s*=\s*"(.*?)"', content, re.S)
+        local_match = _RE_STORAGE_LOCAL_PATH.search(content)
         if local_path_match := local_match:
             self.local_path_entry.delete(0, tk.END)
             self.local_path_entry.insert(0, local_path_match.group(1))
@@ -1576,10 +1772,10 @@ class SaveAnyMonitor:
         self.running = False
         if self.web_server:
             self.web_server.stop()
+        self.close_log_file()
         self.root.destroy()
 
 if __name__ == "__main__":
-    import re
     root = tk.Tk()
     app = SaveAnyMonitor(root)
     root.mainloop()
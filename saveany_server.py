@@ -16,6 +16,8 @@ import base64
 import hmac
 import secrets
 from datetime import datetime
+from collections import deque
+from itertools import islice
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 import socket
@@ -26,7 +28,9 @@ SECRET_KEY = b'SaveAny-Monitor-Auth-Key-2024-Secure'
 # 全局变量
 server_instance = None
 accounts = {}
-server_log = []
+server_log = deque(maxlen=1000)  # 只保留最近1000条日志
+server_log_count = 0  # 累计写入的日志条数，界面据此只追加新日志
+server_log_lock = threading.Lock()
 ACCOUNTS_FILE = 'accounts.dat'
 
 
@@ -114,12 +118,12 @@ def save_accounts():
 
 def add_log(message: str):
     """添加日志"""
-    global server_log
+    global server_log_count
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     log_entry = f"[{timestamp}] {message}"
-    server_log.append(log_entry)
-    if len(server_log) > 1000:
-        server_log = server_log[-500:]
+    with server_log_lock:
+        server_log.append(log_entry)
+        server_log_count += 1
 
 
 class AuthHandler(BaseHTTPRequestHandler):
@@ -255,6 +259,7 @@ class ServerApp:
         self.server = None
         self.server_thread = None
         self.running = False
+        self.shown_log_count = 0  # 日志框中已显示到的累计日志条数
         
         load_accounts()
         self.create_widgets()
@@ -375,7 +380,8 @@ class ServerApp:
     
     def create_log_tab(self):
         # 日志显示
-        self.log_text = scrolledtext.ScrolledText(self.log_frame, wrap='word', height=20)
+        self.log_text = scrolledtext.ScrolledText(self.log_frame, wrap='word', height=20,
+                                                  undo=False, autoseparators=False)
         self.log_text.pack(fill='both', expand=True, padx=10, pady=10)
         
         # 清空按钮
@@ -447,12 +453,11 @@ class ServerApp:
     
     def get_local_ip(self):
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except Exception:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                # UDP connect 不发包也不会阻塞，只查询路由表得到本机出口地址，不经过 DNS
+                s.connect(("8.8.8.8", 80))
+                return s.getsockname()[0]
+        except OSError:
             return "127.0.0.1"
     
     def add_account(self):
@@ -545,19 +550,36 @@ class ServerApp:
             ))
     
     def update_log(self):
-        global server_log
-        
-        self.log_text.config(state='normal')
-        self.log_text.delete('1.0', 'end')
-        self.log_text.insert('1.0', '\n'.join(server_log))
-        self.log_text.see('end')
-        self.log_text.config(state='disabled')
+        """把新增的日志整批追加到日志框，没有新日志时不做任何 Tk 调用"""
+        with server_log_lock:
+            count = server_log_count
+            new = count - self.shown_log_count
+            if new > 0:
+                full = new >= len(server_log)
+                entries = list(server_log) if full else list(islice(server_log, len(server_log) - new, None))
+        if new > 0:
+            self.shown_log_count = count
+            log_text = self.log_text
+            log_text.config(state='normal')
+            if full:
+                # 新日志超过缓冲区长度，旧内容已全部过期，整体重写
+                log_text.delete('1.0', 'end')
+                log_text.insert('end', '\n'.join(entries) + '\n')
+            else:
+                log_text.insert('end', '\n'.join(entries) + '\n')
+                # 与 server_log 一样只保留最近 1000 行
+                lines = int(log_text.index('end-1c').split('.')[0]) - 1
+                if lines > server_log.maxlen:
+                    log_text.delete('1.0', f'{lines - server_log.maxlen + 1}.0')
+            log_text.see('end')
+            log_text.config(state='disabled')
         
         self.root.after(1000, self.update_log)
     
     def clear_log(self):
-        global server_log
-        server_log = []
+        with server_log_lock:
+            server_log.clear()
+            self.shown_log_count = server_log_count
         self.log_text.config(state='normal')
         self.log_text.delete('1.0', 'end')
         self.log_text.config(state='disabled')
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""配置文件 section 正则测试"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from saveany_monitor import _RE_TELEGRAM_BLOCK
+
+
+CONFIG_WITH_ARRAY = """[telegram]
+token = "123:abc"
+admins = [123, 456]
+app_id = 1
+
+[[storages]]
+name = "local"
+"""
+
+
+class TelegramBlockTest(unittest.TestCase):
+
+    def test_array_value_stays_in_block(self):
+        # 值中的 [ 不能被当作下一个 section 的开始
+        match = _RE_TELEGRAM_BLOCK.search(CONFIG_WITH_ARRAY)
+        self.assertIsNotNone(match)
+        self.assertIn('admins = [123, 456]', match.group(0))
+        self.assertIn('app_id = 1', match.group(0))
+        self.assertNotIn('[[storages]]', match.group(0))
+
+    def test_insert_after_block_keeps_values(self):
+        # 与保存代理设置时的插入方式一致
+        proxy_config = '\n[telegram.proxy]\nenable = true\nurl = ""\n'
+        match = _RE_TELEGRAM_BLOCK.search(CONFIG_WITH_ARRAY)
+        content = CONFIG_WITH_ARRAY[:match.end()] + proxy_config + CONFIG_WITH_ARRAY[match.end():]
+        self.assertIn('admins = [123, 456]\n', content)
+        self.assertLess(content.index('app_id = 1'), content.index('[telegram.proxy]'))
+        self.assertLess(content.index('[telegram.proxy]'), content.index('[[storages]]'))
+
+    def test_section_name_prefix_not_matched(self):
+        self.assertIsNone(_RE_TELEGRAM_BLOCK.search('[telegram.proxy]\nenable = true\n'))
+        self.assertIsNone(_RE_TELEGRAM_BLOCK.search('x = "[telegram]"\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()